@@ -1,6 +1,8 @@
-from itertools import product
-from operator import truediv
-from typing import List
+import pickle
+from operator import add, mul, sub
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
 
 from common import verify_result, run_day, run_tests
 
@@ -37,9 +39,7 @@ def part1(data: ParsedData) -> int:
 
 
 def part2(data: ParsedData) -> int:
-    return part_two_v2(data)
-    # bruteforce, very slow - ~20s
-    #return solver(data, 2)
+    return solver(data, 2)
 
 def concat(a, b):
     """Concatenate two integers a and b."""
@@ -51,83 +51,196 @@ def concat(a, b):
         offset *= 10
     return a * offset + b
 
-# Idea found on reddit forum
-# It recursively evaluates the expression by trying to add or multiply the next number
-def recurse_evaluate(start, target, numbers, index=0):
-    if start > target:
+
+# Returned by an inverse when every left operand a satisfies forward(a, b) == target (e.g. a * 0 == 0),
+# the search then accepts the equation without looking at the numbers before b.
+ANY_OPERAND: Any = object()
+
+
+def inverse_add(target: int, b: int) -> Optional[int]:
+    """Returns a such that a + b == target, or None. Operands are non-negative."""
+    return target - b if target >= b else None
+
+
+def inverse_mul(target: int, b: int) -> Optional[int]:
+    """Returns a such that a * b == target, ANY_OPERAND if b == 0 == target, or None."""
+    if b == 0:
+        return ANY_OPERAND if target == 0 else None
+    if target % b != 0:
+        return None
+    return target // b
+
+
+def inverse_concat(target: int, b: int) -> Optional[int]:
+    """Returns a such that concat(a, b) == target, or None."""
+    offset = 10
+    while b >= offset:
+        offset *= 10
+    if target < b or target % offset != b:
+        return None
+    return target // offset
+
+
+class Operator:
+    """
+    Binary operator usable in equations. forward(a, b) computes the result, inverse(target, b) returns
+    the left operand a for which forward(a, b) == target, ANY_OPERAND if every a works, or None if there
+    is no such non-negative integer.
+    """
+    __slots__ = ["symbol", "forward", "inverse"]
+    def __init__(self, symbol: str, forward: Callable[[int, int], int], inverse: Callable[[int, int], Optional[int]]):
+        self.symbol = symbol
+        self.forward = forward
+        self.inverse = inverse
+
+
+OPERATORS: Dict[str, Operator] = {}
+
+
+def register_operator(symbol: str, forward: Callable[[int, int], int],
+                      inverse: Callable[[int, int], Optional[int]]) -> Operator:
+    """
+    Registers operator under symbol, so it can be used in operator sets passed to the solvers.
+    Operators are sent to parallel_solver workers, so forward and inverse must be picklable
+    (module level functions, not lambdas or closures).
+    """
+    for fn in (forward, inverse):
+        try:
+            pickle.dumps(fn)
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            raise ValueError(f"Operator '{symbol}' needs module level functions, {fn!r} can't be pickled") from e
+    op = Operator(symbol, forward, inverse)
+    OPERATORS[symbol] = op
+    return op
+
+
+def unregister_operator(symbol: str) -> None:
+    del OPERATORS[symbol]
+
+
+register_operator('+', add, inverse_add)
+register_operator('*', mul, inverse_mul)
+register_operator('||', concat, inverse_concat)
+
+PART_OPERATORS = {
+    1: ('+', '*'),
+    2: ('+', '*', '||'),
+}
+
+
+def resolve_operators(symbols: Sequence[str]) -> Tuple[Operator, ...]:
+    return tuple(OPERATORS[symbol] for symbol in symbols)
+
+
+def find_operators(target: int, numbers: List[int], operators: Tuple[Operator, ...]) -> Optional[List[str]]:
+    """
+    Finds operator symbols (one per gap between numbers) which make numbers evaluate left to right into target.
+
+    The search goes backwards from target: the last number is peeled off with each operator's inverse,
+    which prunes most branches immediately (not divisible, not a suffix, negative), so nothing is enumerated.
+    """
+    if not numbers:
+        return None
+    symbols: List[str] = []
+
+    def search(value: int, index: int) -> bool:
+        if index == 0:
+            return value == numbers[0]
+        b = numbers[index]
+        for op in operators:
+            prev = op.inverse(value, b)
+            if prev is ANY_OPERAND:
+                # Numbers before b can be combined with any operators
+                symbols.extend(operators[0].symbol for _ in range(index - 1))
+                symbols.append(op.symbol)
+                return True
+            if prev is not None and search(prev, index - 1):
+                symbols.append(op.symbol)
+                return True
         return False
 
-    if index == len(numbers):
-        return start == target
-
-    first = numbers[index]
-
-    if recurse_evaluate(start + first, target, numbers, index + 1):
-        return True
-    if recurse_evaluate(start * first, target, numbers, index + 1):
-        return True
-
-    if first == 0:
-        concat_val = start * 10
-    else:
-        offset = 1
-        while first >= offset:
-            offset *= 10
-        concat_val = start * offset + first
-
-    return recurse_evaluate(concat_val, target, numbers, index + 1)
-
-def part_two_v2(equations: ParsedData):
-    """Solve part two using +, *, and concatenation with dynamic programming."""
-    total = 0
-    for eq in equations.equations:
-        target, numbers = eq.lhs, eq.rhs
-        start = numbers[0]
-        rest = numbers[1:]
-        if recurse_evaluate(start, target, rest):
-            total += target
-    return total
-
-
-def solver(data: ParsedData, part: int) -> int:
-    operators = '+*' if part == 1 else '+*|'
-
-    # Precompute all possible combinations for each operand count encountered
-    # to avoid regenerating them for each equation.
-    operand_counts = set(len(eq.rhs) - 1 for eq in data.equations)
-    combinations_cache = {}
-    for count in operand_counts:
-        if count >= 0:
-            combinations_cache[count] = [''.join(p) for p in product(operators, repeat=count)]
+    return symbols if search(target, len(numbers) - 1) else None
 
-    result = 0
 
-    for eq in data.equations:
-        number_of_operands = len(eq.rhs) - 1
-        combinations = combinations_cache[number_of_operands]
-        lhs_val = eq.lhs
-        rhs_list = eq.rhs
-
-        # Try each combination until we find one that matches eq.lhs
-        for comb in combinations:
-            test_sum = rhs_list[0]
-            match = True
-            for i, op in enumerate(comb, start=1):
-                rhs_val = rhs_list[i]
-                if op == '+':
-                    test_sum += rhs_val
-                elif op == '*':
-                    test_sum *= rhs_val
-                else:
-                    # '|' operation: concatenate numbers
-                    test_sum = concat(test_sum, rhs_val)
-                if test_sum > lhs_val:
-                    break
-
-            if test_sum == lhs_val:
-                result += test_sum
-                break
+def evaluate_expression(numbers: List[int], symbols: Sequence[str]) -> int:
+    """Evaluates numbers left to right with the given operator symbols."""
+    value = numbers[0]
+    for symbol, b in zip(symbols, numbers[1:]):
+        value = OPERATORS[symbol].forward(value, b)
+    return value
+
+
+# How many chunks each worker should get on average, more chunks give better load balancing
+# (equations differ a lot in cost) and allow quicker reaction to cancellation.
+CHUNKS_PER_PROCESS = 8
+# How often (in equations) the worker checks the shared cancel flag.
+CANCEL_CHECK_INTERVAL = 64
+
 
+def equation_cost(eq: Equation, operators_count: int) -> int:
+    """Worst case number of evaluated leaves for the equation."""
+    return operators_count ** max(len(eq.rhs) - 1, 0)
+
+
+def split_into_chunks(equations: List[Equation], operators_count: int, num_processes: int) -> List[Tuple[int, int]]:
+    """
+    Splits equations into (start, end) ranges of roughly equal estimated work. Work of an equation grows
+    exponentially with its operand count, so chunks with long equations are shorter than chunks with short ones.
+    """
+    costs = [equation_cost(eq, operators_count) for eq in equations]
+    total_cost = sum(costs)
+    budget = max(total_cost // (num_processes * CHUNKS_PER_PROCESS), 1)
+
+    ranges = []
+    start, acc = 0, 0
+    for i, cost in enumerate(costs):
+        acc += cost
+        if acc >= budget:
+            ranges.append((start, i + 1))
+            start, acc = i + 1, 0
+    if start < len(equations):
+        ranges.append((start, len(equations)))
+    return ranges
+
+
+def check_equations_chunk(equations: List[Equation], operators: Tuple[Operator, ...], cancel_event) -> int:
+    """Sums lhs of solvable equations in the chunk, stops early if cancel_event gets set."""
+    local_total = 0
+    for i, eq in enumerate(equations):
+        if cancel_event is not None and i % CANCEL_CHECK_INTERVAL == 0 and cancel_event.is_set():
+            break
+        if find_operators(eq.lhs, eq.rhs, operators) is not None:
+            local_total += eq.lhs
+    return local_total
+
+
+def check_equations_chunk_wrapper(args):
+    return check_equations_chunk(*args)
+
+
+def parallel_solver(data: ParsedData, part: int, num_processes: int = 4, cancel_event=None,
+                    operator_symbols: Optional[Sequence[str]] = None) -> List[int]:
+    """
+    Checks equations on a process pool. Returns partial sums, one per chunk, in the order of data.equations.
+    cancel_event is an optional shared flag (e.g. Manager().Event()), once it is set workers stop and
+    the sums computed so far are returned.
+    """
+    operators = resolve_operators(operator_symbols or PART_OPERATORS[part])
+    equations = data.equations
+    ranges = split_into_chunks(equations, len(operators), num_processes)
+    tasks = [(equations[start:end], operators, cancel_event) for start, end in ranges]
+
+    with ProcessPoolExecutor(max_workers=num_processes) as executor:
+        return list(executor.map(check_equations_chunk_wrapper, tasks))
+
+
+def solver(data: ParsedData, part: int, operator_symbols: Optional[Sequence[str]] = None) -> int:
+    """Sums lhs of equations solvable with the part's operators (or a custom set of registered symbols)."""
+    operators = resolve_operators(operator_symbols or PART_OPERATORS[part])
+    result = 0
+    for eq in data.equations:
+        if find_operators(eq.lhs, eq.rhs, operators) is not None:
+            result += eq.lhs
     return result
 
 
@@ -152,8 +265,32 @@ def test(part) -> bool:
     all_pass = True
     if part == 1:
         all_pass = verify_result(part1(parsed_data), 3749, 1) and all_pass
+        all_pass = verify_result(sum(parallel_solver(parsed_data, 1, 2)), 3749, 1) and all_pass
     if part == 2:
         all_pass = verify_result(part2(parsed_data), 11387, 2) and all_pass
+        all_pass = verify_result(sum(parallel_solver(parsed_data, 2, 2)), 11387, 2) and all_pass
+        with Manager() as manager:
+            cancel_event = manager.Event()
+            cancel_event.set()
+            all_pass = verify_result(sum(parallel_solver(parsed_data, 2, 2, cancel_event)), 0, 2) and all_pass
+        symbols = find_operators(7290, [6, 8, 6, 15], resolve_operators(PART_OPERATORS[2]))
+        all_pass = verify_result(evaluate_expression([6, 8, 6, 15], symbols), 7290, 2) and all_pass
+        # Zero operand makes everything before it irrelevant
+        for zero_input, expected in (("7: 3 0 7", 7), ("12: 4 0 3 12", 12)):
+            zero_data = parse_input(zero_input)
+            all_pass = verify_result(part1(zero_data), expected, 1) and all_pass
+            all_pass = verify_result(part2(zero_data), expected, 2) and all_pass
+        symbols = find_operators(12, [4, 0, 3, 12], resolve_operators(PART_OPERATORS[2]))
+        all_pass = verify_result(evaluate_expression([4, 0, 3, 12], symbols), 12, 2) and all_pass
+
+        # Custom operator, a - b == target inverts to target + b
+        register_operator('-', sub, add)
+        try:
+            custom_data = parse_input("4: 10 2 4\n2: 5 3\n9: 5 3")
+            all_pass = verify_result(solver(custom_data, 2, ('+', '-')), 6, 2) and all_pass
+            all_pass = verify_result(sum(parallel_solver(custom_data, 2, 2, operator_symbols=('+', '-'))), 6, 2) and all_pass
+        finally:
+            unregister_operator('-')
     return all_pass
 
 
@@ -1,5 +1,11 @@
 from typing import List, Tuple
 from collections import defaultdict
+from math import gcd
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 from common import verify_result, run_day, run_tests
 from functools import cmp_to_key
@@ -33,34 +39,100 @@ def parse_input(data: str) -> ParsedData:
 def part1(data: ParsedData) -> int:
     return solver(data, 1)
 
-def solver(data: ParsedData, part: int) -> int:
+def mark_line(marked: bytearray, x: int, y: int, dx: int, dy: int, width: int, height: int):
+    """Marks (x, y), (x + dx, y + dy), ... until the point leaves the grid."""
+    while 0 <= x < width and 0 <= y < height:
+        marked[y * width + x] = 1
+        x += dx
+        y += dy
 
+def solver(data: ParsedData, part: int) -> int:
+    width, height = data.width, data.height
 
-    antinodes: dict[str, set[Point]] = {}
-    for key, tower in data.towers.items():
-        #print(f"key: {key}, tower: {tower}")
+    # One cell per grid position, set to 1 when it holds an antinode of any frequency.
+    antinodes = bytearray(width * height)
+    for tower in data.towers.values():
+        # Each unordered pair once, antinodes are generated on both sides of the pair.
         for i in range(len(tower)):
-            for j in range(len(tower)):
-                if i == j:
-                    continue
-                x1, y1 = tower[i]
+            x1, y1 = tower[i]
+            for j in range(i + 1, len(tower)):
                 x2, y2 = tower[j]
-
-                for d in range(1 if part == 1 else 0, 100):
-                    a_x = (x2 - x1) * (2 if part == 1 else 1) * d + x1
-                    a_y = (y2 - y1) * (2 if part == 1 else 1) * d + y1
-                    if a_x < 0 or a_x >= data.width or a_y < 0 or a_y >= data.height:
-                        break
-                    if key not in antinodes:
-                        antinodes[key] = set[tuple[int, int]]()
-                    antinodes[key].add((a_x, a_y))
-                    if part == 1:
-                        break
-
-    all_ants = set[tuple[int,int]]()
-    for ants in antinodes.values():
-        all_ants.update(ants)
-    return len(all_ants)
+                dx, dy = x2 - x1, y2 - y1
+
+                if part == 1:
+                    for a_x, a_y in ((x2 + dx, y2 + dy), (x1 - dx, y1 - dy)):
+                        if 0 <= a_x < width and 0 <= a_y < height:
+                            antinodes[a_y * width + a_x] = 1
+                else:
+                    # Step with the smallest integer vector on the line, so no grid point in line is skipped.
+                    g = gcd(dx, dy)
+                    dx, dy = dx // g, dy // g
+                    mark_line(antinodes, x1, y1, dx, dy, width, height)
+                    mark_line(antinodes, x1 - dx, y1 - dy, -dx, -dy, width, height)
+
+    return antinodes.count(1)
+
+# Pairs processed at once by solver_numpy, bounds the size of the candidate arrays.
+PAIR_CHUNK = 4096
+
+def multiple_range(position, step, size: int):
+    """
+    Per pair range [lo, hi] of k for which position + k * step stays in 0..size-1 on one axis
+    (position is inside). Axes with zero step don't limit k, lo/hi are then the int64 extremes.
+    """
+    unbounded = np.iinfo(np.int64).max
+    # Mirror negative steps, the range of k is the same for the mirrored coordinate.
+    mirrored = np.where(step < 0, size - 1 - position, position)
+    magnitude = np.abs(step)
+    safe = np.maximum(magnitude, 1)
+    lo = np.where(magnitude > 0, -(mirrored // safe), -unbounded)
+    hi = np.where(magnitude > 0, (size - 1 - mirrored) // safe, unbounded)
+    return lo, hi
+
+def solver_numpy(data: ParsedData, part: int, max_multiple: int = 0) -> int:
+    """
+    Vectorized variant of solver, for frequencies with many antennas. All pair deltas of a frequency
+    are computed at once by broadcasting, antinodes (and part 2 harmonics, stepped by the gcd-reduced delta
+    up to max_multiple in both directions) are generated as arrays and marked in a grid sized bool array.
+    For part 2 each pair only gets the multiples which stay in the grid (all of them unless max_multiple
+    limits it), and pairs go in chunks of PAIR_CHUNK, so memory stays bounded by the real antinode count.
+    """
+    width, height = data.width, data.height
+    antinodes = np.zeros(width * height, dtype=bool)
+    for tower in data.towers.values():
+        if len(tower) < 2:
+            continue
+        points = np.array(tower, dtype=np.int64)
+        pair_i, pair_j = np.triu_indices(len(points), k=1)
+        for chunk_start in range(0, len(pair_i), PAIR_CHUNK):
+            p1 = points[pair_i[chunk_start:chunk_start + PAIR_CHUNK]]
+            p2 = points[pair_j[chunk_start:chunk_start + PAIR_CHUNK]]
+            delta = p2 - p1
+
+            if part == 1:
+                candidates = np.concatenate((p2 + delta, p1 - delta))
+                x, y = candidates[:, 0], candidates[:, 1]
+                in_grid = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+                antinodes[y[in_grid] * width + x[in_grid]] = True
+                continue
+
+            step = delta // np.gcd(delta[:, 0], delta[:, 1])[:, None]
+            lo_x, hi_x = multiple_range(p1[:, 0], step[:, 0], width)
+            lo_y, hi_y = multiple_range(p1[:, 1], step[:, 1], height)
+            lo, hi = np.maximum(lo_x, lo_y), np.minimum(hi_x, hi_y)
+            if max_multiple > 0:
+                lo, hi = np.maximum(lo, -max_multiple), np.minimum(hi, max_multiple)
+
+            # Flattened k = lo..hi of every pair
+            counts = hi - lo + 1
+            pair = np.repeat(np.arange(len(counts)), counts)
+            first = np.repeat(np.cumsum(counts) - counts, counts)
+            k = lo[pair] + (np.arange(pair.size) - first)
+            x = p1[pair, 0] + k * step[pair, 0]
+            y = p1[pair, 1] + k * step[pair, 1]
+            antinodes[y * width + x] = True
+
+    return int(np.count_nonzero(antinodes))
 
 def part2(data: ParsedData) -> int:
     return solver(data, 2)
@@ -92,10 +164,14 @@ def test(part) -> bool:
     # Test part 1
     if (part == 1):
         all_pass = all_pass and verify_result(part1(parsed_data), 14, 1)
+        if np is not None:
+            all_pass = all_pass and verify_result(solver_numpy(parsed_data, 1), 14, 1)
 
     # Test part 2
     if (part == 2):
         all_pass = all_pass and verify_result(part2(parsed_data), 34, 2)
+        if np is not None:
+            all_pass = all_pass and verify_result(solver_numpy(parsed_data, 2), 34, 2)
 
     return all_pass
 
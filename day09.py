@@ -1,5 +1,6 @@
 from typing import List, Tuple
 from collections import defaultdict
+import heapq
 
 from common import verify_result, run_day, run_tests
 from functools import cmp_to_key
@@ -19,128 +20,117 @@ def parse_input(data: str) -> ParsedData:
 def part1(data: ParsedData) -> int:
     return solver(data, 1)
 
-def solver(data: ParsedData, part: int) -> int:
-    fs: List[int] = []
-
-    # Build the initial list
-    for index, char in enumerate(data.line.strip()):
+Span = Tuple[int, int, int]  # (start, length, file_id)
+
+def build_spans(line: str) -> Tuple[List[Span], List[Tuple[int, int]]]:
+    """
+    Splits disk map into file spans (start, length, file_id) and free spans (start, length).
+    Free span k is the gap right after file k (possibly empty), so both lists have the same length.
+    A zero length file (other than the first one) is dropped and the gaps around it form one free span.
+    """
+    files: List[Span] = []
+    free: List[Tuple[int, int]] = []
+    position = 0
+    merge_gap = False
+    for index, char in enumerate(line):
+        length = int(char)
         if index % 2 == 0:
-            for k in range(0, int(char)):
-                fs.append(index // 2)
+            if length == 0 and files:
+                merge_gap = True
+                continue
+            files.append((position, length, index // 2))
+        elif merge_gap:
+            gap_start, gap_length = free[-1]
+            free[-1] = (gap_start, gap_length + length)
+            merge_gap = False
         else:
-            for k in range(0, int(char)):
-                fs.append(-1)
-
-    if part == 1:
-        last_free_index = 0
-        for i in range(len(fs)-1, 0, -1):
-            if fs[i] == -1:
+            free.append((position, length))
+        position += length
+    if len(free) < len(files):
+        free.append((position, 0))
+    return files, free
+
+def span_checksum(start: int, length: int, file_id: int) -> int:
+    # file_id * (start + (start + 1) + ... + (start + length - 1))
+    return file_id * (length * (2 * start + length - 1) // 2)
+
+def compact_blocks(files: List[Span], free: List[Tuple[int, int]]) -> List[Span]:
+    """
+    Part 1: moves single blocks from the end of the disk into the leftmost free blocks.
+    Two pointers: left walks files in place, right gives away blocks from the last not yet moved file.
+    """
+    spans: List[Span] = []
+    left, right = 0, len(files) - 1
+    right_remaining = files[right][1] if files else 0
+    while left < right:
+        spans.append(files[left])
+        fstart, flen = free[left]
+        while flen > 0 and left < right:
+            if right_remaining == 0:
+                right -= 1
+                right_remaining = files[right][1]
                 continue
-            for k in range(last_free_index, i):
-                if fs[k] == -1:
-                    fs[k] = fs[i]
-                    fs[i] = -1
-                    last_free_index = k
-                    break
-            if last_free_index >= i:
-                break
-    else:
-        # Build indexed data structures for free spaces (from left) and used blocks (from right)
-        fs_len = len(fs)
-        free_blocks: List[Tuple[int, int, int]] = []      # (start, end, len)
-        used_blocks: List[Tuple[int, int, int, int]] = []  # (start, end, value, len)
-
-        i = 0
-        while i < fs_len:
-            if fs[i] == -1:
-                start = i
-                while i < fs_len and fs[i] == -1:
-                    i += 1
-                end = i - 1
-                free_blocks.append((start, end, end - start + 1))
-
-                #It would seem to be good idea to keep free blocks count in some map to quicly know
-                #how many are still available, but in case of the problem it is not needed as there is
-                #plenty of free space and this check would always pass.
-            else:
-                i += 1
-
-        # Identify used blocks from right side
-        i = fs_len - 1
-        while i >= 0:
-            if fs[i] != -1:
-                v = fs[i]
-                end = i
-                start = i
-                i -= 1
-                while i >= 0 and fs[i] == v:
-                    start = i
-                    i -= 1
-                used_blocks.append((start, end, v, end - start + 1))
-            else:
-                i -= 1
-
-        # used_blocks is currently from right to left, we want to process them in that order
-        # so no reversion needed since we started from the right.
-        # We'll try to move each used block into a suitable free block (starting from left most free block)
-        # We'll iterate until no moves are possible or used_blocks are done.
-
-        ub_idx = 0
-        used_blocks_len = len(used_blocks)
-        free_blocks_len = len(free_blocks)
-        while ub_idx < used_blocks_len:
-            ustart, uend, uv, ulen = used_blocks[ub_idx]
-
-            # Find a free block that can accommodate this used block
-            found_block = False
-            fb_idx = 0
-            while fb_idx < free_blocks_len:
-                fstart, fend, flen = free_blocks[fb_idx]
-                if flen >= ulen:
-                    # Move block ustart->uend into fstart->fstart+ulen-1
-                    for offset in range(ulen):
-                        fs[fstart + offset] = uv
-                        fs[ustart + offset] = -1
-
-                    if flen == ulen:
-                        # Update free block, it got fully filled
-                        del free_blocks[fb_idx]
-                        free_blocks_len -= 1
-                    else:
-                        # Update free block, it just got partially filled
-                        free_blocks[fb_idx] = (fstart + ulen, fend, fend - fstart - ulen + 1)
-
-                    # The used block was fully moved, move to next one.
-                    ub_idx+=1
-                    found_block = True
-                    break
-                else:
-                    fb_idx += 1
-
-            if not found_block:
-                # No suitable free block found for this used block
-                # Move on to the next used block
-                ub_idx += 1
-
-            #from free blocks, remove (starting from right) blocks which does not pass: fstart < ustart:
-            #This gives large optimization
-            while free_blocks_len > 0:
-                if free_blocks[free_blocks_len - 1][0] >= ustart:
-                    free_blocks_len -= 1
-                else:
-                    break
-
-            if used_blocks_len == ub_idx:
-                break
-
-    # Compute check_sum
-    check_sum = 0
-    for i, val in enumerate(fs):
-        if val == -1:
-            continue
-        check_sum += val * i
-
-    return check_sum
+            take = min(flen, right_remaining)
+            spans.append((fstart, take, files[right][2]))
+            fstart += take
+            flen -= take
+            right_remaining -= take
+        left += 1
+
+    # The file both pointers met at keeps its leading blocks in place.
+    if left == right and right_remaining > 0:
+        spans.append((files[right][0], right_remaining, files[right][2]))
+    return spans
+
+class FreeSpanIndex:
+    """
+    Free spans bucketed by length, each bucket is a min-heap of span starts. The leftmost span of length >= L
+    is the smallest head among buckets L.., so a lookup costs a few heap peeks and one pop. Spans are at most 9
+    long unless gaps around zero length files were merged.
+    """
+    __slots__ = ["buckets"]
+
+    def __init__(self, free: List[Tuple[int, int]]):
+        max_length = max((length for _, length in free), default=0)
+        self.buckets: List[List[int]] = [[] for _ in range(max_length + 1)]
+        for start, length in free:
+            if length > 0:
+                self.buckets[length].append(start)
+        for bucket in self.buckets:
+            heapq.heapify(bucket)
+
+    def take(self, length: int, before: int) -> int:
+        """
+        Allocates length blocks from the leftmost free span which fits and starts before the given position.
+        Leftover part of the span is put back into the bucket of its new length. Returns start or -1.
+        """
+        best_length, best_start = 0, before
+        for span_length in range(length, len(self.buckets)):
+            bucket = self.buckets[span_length]
+            if bucket and bucket[0] < best_start:
+                best_length, best_start = span_length, bucket[0]
+        if best_length == 0:
+            return -1
+
+        heapq.heappop(self.buckets[best_length])
+        if best_length > length:
+            heapq.heappush(self.buckets[best_length - length], best_start + length)
+        return best_start
+
+def compact_files(files: List[Span], free: List[Tuple[int, int]]) -> List[Span]:
+    """Part 2: moves whole files, from the highest id, into the leftmost free span they fit in."""
+    free_index = FreeSpanIndex(free)
+    spans: List[Span] = []
+    for ustart, ulen, uid in reversed(files):
+        new_start = free_index.take(ulen, ustart) if ulen > 0 else -1
+        # Space left behind by a moved file is right of all files still to process, so it is never reused.
+        spans.append((new_start if new_start != -1 else ustart, ulen, uid))
+    return spans
+
+def solver(data: ParsedData, part: int) -> int:
+    files, free = build_spans(data.line.strip())
+    spans = compact_blocks(files, free) if part == 1 else compact_files(files, free)
+    return sum(span_checksum(start, length, file_id) for start, length, file_id in spans)
 
 
 def part2(data: ParsedData) -> int:
@@ -166,6 +156,10 @@ def test(part) -> bool:
     # Test part 2
     if (part == 2):
         all_pass = all_pass and verify_result(part2(parsed_data), 2858, 2)
+        # File 3 must stay in place even though a large enough free span exists to its right.
+        all_pass = all_pass and verify_result(part2(parse_input("191323686")), 510, 2)
+        # Gaps around a zero length file form one free span.
+        all_pass = all_pass and verify_result(part2(parse_input("11012")), 6, 2)
 
     return all_pass
 
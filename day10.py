@@ -1,11 +1,13 @@
-from typing import List, Tuple
+from typing import Callable, List, Optional, Set, Tuple
 from collections import defaultdict
 
 from common import verify_result, run_day, run_tests
 from functools import cmp_to_key
-from PIL import Image, ImageDraw, ImageFont
 
-frames = []  # global or passed around, will collect all frames
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # Class
 class ParsedData:
@@ -40,113 +42,133 @@ class TrailHead:
         self.pos = position
         self.paths = List[List[Point]]()
 
-def gridWalk(data: ParsedData, pt: Point, path: List[Point]) -> List[List[Point]]:
-    prev = data.grid[path[-1][1]][path[-1][0]] if len(path) > 0 else 0
-
-    if prev == 9:
-        return [path]
-
-    result = []
-    dirs = [(0, -1), (-1, 0), (0, 1), (1, 0)]
-
-    for dir in dirs:
-        x, y = pt
-        x += dir[0]
-        y += dir[1]
-        if x < 0 or x >= data.width or y < 0 or y >= data.height:
-            continue
-        new = data.grid[y][x]
-        if prev + 1 != new:
-            continue
-        new_path = path.copy()
-        new_path.append((x, y))
-        paths = gridWalk(data, (x, y), new_path)
-        result.extend(paths)
-
-    return result
-
-
-def draw_grid_with_paths(data: ParsedData, paths: List[List[Point]], max_height: int) -> None:
-    from PIL import Image, ImageDraw, ImageFont
-
-    cell_size = 20
-    img_width = data.width * cell_size
-    img_height = data.height * cell_size
-    img = Image.new("RGB", (img_width, img_height), color=(200, 200, 200))
-    draw = ImageDraw.Draw(img)
-    font = ImageFont.load_default()
-
-    path_points = set(pt for p in paths for pt in p)
-    start_points = set(p[0] for p in paths if p)
-
-    non_path_bg = (220, 220, 220)
-    path_bg = (180, 180, 180)
-    start_color = (0, 0, 255)
-    nine_color = (255, 0, 0)
-    path_color = (0, 128, 0)
-    default_color = (0, 0, 0)
-
-    # Softer blue for zero from path
-    zero_bg = (50, 100, 255)
-    zero_text = (200, 200, 200)
-
-    for y in range(data.height):
-        for x in range(data.width):
-            val = data.grid[y][x]
-            x0 = x * cell_size
-            y0 = y * cell_size
-
-            if (x, y) in path_points:
-                if val == 0:
-                    draw.rectangle([x0, y0, x0+cell_size, y0+cell_size], fill=zero_bg)
-                    draw.text((x0+5, y0+5), str(val), font=font, fill=zero_text)
-                else:
-                    draw.rectangle([x0, y0, x0+cell_size, y0+cell_size], fill=path_bg)
-                    if val > max_height:
-                        draw.text((x0+5, y0+5), str(val), font=font, fill=default_color)
-                    else:
-                        if (x, y) in start_points:
-                            draw.text((x0+5, y0+5), str(val), font=font, fill=start_color)
-                        elif val == 9:
-                            draw.text((x0+5, y0+5), str(val), font=font, fill=nine_color)
-                        else:
-                            draw.text((x0+5, y0+5), str(val), font=font, fill=path_color)
-            else:
-                draw.rectangle([x0, y0, x0+cell_size, y0+cell_size], fill=non_path_bg)
-                draw.text((x0+5, y0+5), str(val), font=font, fill=default_color)
+def trail_cells(data: ParsedData, trailhead: Point, paths: List[int]) -> Set[Point]:
+    """Cells lying on any trail from trailhead, walks only cells from which some summit is reachable."""
+    width, height, grid = data.width, data.height, data.grid
+    cells = {trailhead}
+    stack = [trailhead]
+    while stack:
+        x, y = stack.pop()
+        next_level = grid[y][x] + 1
+        for nx, ny in ((x, y - 1), (x - 1, y), (x, y + 1), (x + 1, y)):
+            if (0 <= nx < width and 0 <= ny < height and grid[ny][nx] == next_level
+                    and paths[ny * width + nx] > 0 and (nx, ny) not in cells):
+                cells.add((nx, ny))
+                stack.append((nx, ny))
+    return cells
+
+
+def trail_tables(data: ParsedData) -> Tuple[List[int], List[int]]:
+    """
+    Dynamic programming over height levels from 9 down to 0, cells are indexed as y * width + x.
+    Returns (paths, summits): paths[i] is the number of distinct trails from cell i to any 9, summits[i]
+    is a bitset (python int, one bit per 9-cell) of summits reachable from cell i.
+    Each cell is computed once from its neighbours one level higher and shared by all trailheads.
+    """
+    width, height, grid = data.width, data.height, data.grid
+    cells_by_level: List[List[int]] = [[] for _ in range(10)]
+    for y in range(height):
+        row = grid[y]
+        for x in range(width):
+            cells_by_level[row[x]].append(y * width + x)
+
+    paths = [0] * (width * height)
+    summits = [0] * (width * height)
+    for bit, idx in enumerate(cells_by_level[9]):
+        paths[idx] = 1
+        summits[idx] = 1 << bit
+
+    for level in range(8, -1, -1):
+        for idx in cells_by_level[level]:
+            y, x = divmod(idx, width)
+            count, reach = 0, 0
+            for nx, ny in ((x, y - 1), (x - 1, y), (x, y + 1), (x + 1, y)):
+                if 0 <= nx < width and 0 <= ny < height and grid[ny][nx] == level + 1:
+                    n_idx = ny * width + nx
+                    count += paths[n_idx]
+                    reach |= summits[n_idx]
+            paths[idx] = count
+            summits[idx] = reach
+
+    return paths, summits
+
+
+def shift_reduce(a, ufunc):
+    """Combines each cell of a (along the first two axes) with its four neighbours' values, using ufunc."""
+    out = np.zeros_like(a)
+    ufunc(out[1:], a[:-1], out=out[1:])
+    ufunc(out[:-1], a[1:], out=out[:-1])
+    ufunc(out[:, 1:], a[:, :-1], out=out[:, 1:])
+    ufunc(out[:, :-1], a[:, 1:], out=out[:, :-1])
+    return out
+
+
+def popcount(a):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(a)
+    return np.unpackbits(a.view(np.uint8)).reshape(a.shape + (64,)).sum(axis=-1)
+
+
+def trail_ratings_numpy(grid) -> int:
+    """Part 2: number of paths per level is the sum of path counts of four neighbours one level higher."""
+    counts = (grid == 9).astype(np.int64)
+    for level in range(8, -1, -1):
+        counts = np.where(grid == level, shift_reduce(counts, np.add), 0)
+    return int(counts.sum())
+
+
+def trail_scores_numpy(grid, block_words: int = 4) -> int:
+    """
+    Part 1: each summit gets one bit, bits are propagated down the levels by or-ing neighbours.
+    Summits are processed in blocks of 64 * block_words bits (uint64 words per cell). Trails are only
+    9 steps long, so a block only needs the band of rows around its summits, which bounds memory.
+    """
+    height = grid.shape[0]
+    width = grid.shape[1]
+    summit_indices = np.flatnonzero(grid == 9)
+    block_size = 64 * block_words
+    total = 0
+    for block_start in range(0, len(summit_indices), block_size):
+        ys, xs = np.divmod(summit_indices[block_start:block_start + block_size], width)
+        top, bottom = max(int(ys[0]) - 9, 0), min(int(ys[-1]) + 10, height)
+        band = grid[top:bottom]
+
+        bits = np.zeros(band.shape + (block_words,), dtype=np.uint64)
+        k = np.arange(len(ys))
+        np.bitwise_or.at(bits, (ys - top, xs, k // 64), np.left_shift(np.uint64(1), (k % 64).astype(np.uint64)))
+        for level in range(8, -1, -1):
+            bits = np.where((band == level)[..., None], shift_reduce(bits, np.bitwise_or), np.uint64(0))
+        total += int(popcount(bits).sum())
+    return total
 
-    frames.append(img)
 
+def solver_numpy(data: ParsedData, part: int) -> int:
+    """Vectorized variant of solver, each level is handled with a few whole-grid array operations."""
+    grid = np.array(data.grid, dtype=np.int8)
+    return trail_scores_numpy(grid) if part == 1 else trail_ratings_numpy(grid)
 
 
-def solver(data: ParsedData, part: int) -> int:
+def solver(data: ParsedData, part: int,
+           on_trailhead: Optional[Callable[[Point, Set[Point]], None]] = None) -> int:
+    """
+    on_trailhead, if given, is called for each trailhead with the set of cells on its trails
+    (used by day10_animation to export the GIF).
+    """
     total = 0
 
-    ENABLE_SAVE_2_GIF = False
-    if (ENABLE_SAVE_2_GIF):
-        print("!!!! SLOW !!!! Saving to GIF")
-
+    paths, summits = trail_tables(data)
     for y in range(data.height):
         for x in range(data.width):
             if data.grid[y][x] != 0:
                 continue
-            paths = gridWalk(data, (x, y), [(x, y)])
+            idx = y * data.width + x
             if part == 1:
-                dest_9_positions: set[Point] = set()
-                for path in paths:
-                    if len(path) == 10:
-                        dest_9_positions.add(path[-1])
-                total += len(dest_9_positions)
+                total += summits[idx].bit_count()
             else:
-                total += len(paths)
-
-            if ENABLE_SAVE_2_GIF:
-                for h in range(0, 10):
-                    draw_grid_with_paths(data, paths, h)
+                total += paths[idx]
 
-    if ENABLE_SAVE_2_GIF:
-        if len(frames) > 0:
-            frames[0].save('day10_animation.gif', save_all=True, append_images=frames[1:], duration=200, loop=0, optimize=True)
+            if on_trailhead is not None:
+                on_trailhead((x, y), trail_cells(data, (x, y), paths))
 
     return total
 
@@ -177,10 +199,14 @@ def test(part) -> bool:
     # Test part 1
     if (part == 1):
         all_pass = all_pass and verify_result(part1(parsed_data), 36, 1)
+        if np is not None:
+            all_pass = all_pass and verify_result(solver_numpy(parsed_data, 1), 36, 1)
 
     # Test part 2
     if (part == 2):
         all_pass = all_pass and verify_result(part2(parsed_data), 81, 2)
+        if np is not None:
+            all_pass = all_pass and verify_result(solver_numpy(parsed_data, 2), 81, 2)
 
     return all_pass
 
@@ -0,0 +1,108 @@
+from pathlib import Path
+from typing import List, Set, Tuple
+
+from PIL import Image, ImageDraw, ImageFont, GifImagePlugin
+
+from day10 import ParsedData, Point, parse_input, solver
+
+# Frames are drawn in "P" mode with this fixed palette, so every frame can be encoded and written
+# to the file as soon as it is drawn, without keeping previous frames around.
+PALETTE: List[Tuple[int, int, int]] = [
+    (220, 220, 220),  # non path background
+    (180, 180, 180),  # path background
+    (0, 0, 255),      # start
+    (255, 0, 0),      # nine
+    (0, 128, 0),      # path
+    (0, 0, 0),        # default
+    (50, 100, 255),   # softer blue for zero from path
+    (200, 200, 200),  # zero text
+]
+NON_PATH_BG, PATH_BG, START_COLOR, NINE_COLOR, PATH_COLOR, DEFAULT_COLOR, ZERO_BG, ZERO_TEXT = range(len(PALETTE))
+
+CELL_SIZE = 20
+
+
+class GifTrailExporter:
+    """
+    Streams day10 trails into an animated GIF. Pass an instance as on_trailhead callback to day10.solver,
+    for each trailhead 10 frames are rendered (one per revealed height) and written immediately.
+    """
+    def __init__(self, filename: str, data: ParsedData, duration: int = 200):
+        self.filename = filename
+        self.data = data
+        self.duration = duration
+        self.fp = None
+        self.frame_count = 0
+        self.font = ImageFont.load_default()
+        self.palette = [c for color in PALETTE for c in color]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __call__(self, trailhead: Point, trail_cells: Set[Point]) -> None:
+        for h in range(0, 10):
+            self.write_frame(self.draw_grid_with_paths(trailhead, trail_cells, h))
+
+    def draw_grid_with_paths(self, trailhead: Point, trail_cells: Set[Point], max_height: int) -> Image.Image:
+        data = self.data
+        img = Image.new("P", (data.width * CELL_SIZE, data.height * CELL_SIZE), color=NON_PATH_BG)
+        img.putpalette(self.palette)
+        draw = ImageDraw.Draw(img)
+        font = self.font
+
+        for y in range(data.height):
+            for x in range(data.width):
+                val = data.grid[y][x]
+                x0 = x * CELL_SIZE
+                y0 = y * CELL_SIZE
+
+                if (x, y) in trail_cells:
+                    if val == 0:
+                        draw.rectangle([x0, y0, x0+CELL_SIZE, y0+CELL_SIZE], fill=ZERO_BG)
+                        draw.text((x0+5, y0+5), str(val), font=font, fill=ZERO_TEXT)
+                    else:
+                        draw.rectangle([x0, y0, x0+CELL_SIZE, y0+CELL_SIZE], fill=PATH_BG)
+                        if val > max_height:
+                            draw.text((x0+5, y0+5), str(val), font=font, fill=DEFAULT_COLOR)
+                        elif (x, y) == trailhead:
+                            draw.text((x0+5, y0+5), str(val), font=font, fill=START_COLOR)
+                        elif val == 9:
+                            draw.text((x0+5, y0+5), str(val), font=font, fill=NINE_COLOR)
+                        else:
+                            draw.text((x0+5, y0+5), str(val), font=font, fill=PATH_COLOR)
+                else:
+                    draw.rectangle([x0, y0, x0+CELL_SIZE, y0+CELL_SIZE], fill=NON_PATH_BG)
+                    draw.text((x0+5, y0+5), str(val), font=font, fill=DEFAULT_COLOR)
+        return img
+
+    def write_frame(self, frame: Image.Image) -> None:
+        if self.fp is None:
+            self.fp = open(self.filename, "wb")
+            header, _ = GifImagePlugin.getheader(frame, info={"loop": 0})
+            for chunk in header:
+                self.fp.write(chunk)
+        for chunk in GifImagePlugin.getdata(frame, duration=self.duration):
+            self.fp.write(chunk)
+        self.frame_count += 1
+
+    def close(self) -> None:
+        if self.fp is not None:
+            self.fp.write(b";")  # GIF trailer
+            self.fp.close()
+            self.fp = None
+
+
+def save_animation(data: ParsedData, filename: str = 'day10_animation.gif', duration: int = 200) -> int:
+    """Solves part 2 while writing the animation, returns number of written frames."""
+    with GifTrailExporter(filename, data, duration) as exporter:
+        solver(data, 2, on_trailhead=exporter)
+    return exporter.frame_count
+
+
+if __name__ == "__main__":
+    print("!!!! SLOW !!!! Saving to GIF")
+    input_file = Path("../adventofcode_input/2024/data/day10.txt")
+    save_animation(parse_input(input_file.read_text().strip()))
@@ -1,3 +1,7 @@
+from bisect import bisect_right
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
 from common import verify_result, run_day, run_tests
 
 class ParsedData:
@@ -17,43 +21,120 @@ def part1(data: ParsedData, blinks: int = 25) -> int:
     return solver(data, blinks)
 
 
+# POWERS_OF_10[k] == 10 ** k, extended on demand by digit_count.
+POWERS_OF_10: List[int] = [10 ** k for k in range(20)]
+
+
+def digit_count(num: int) -> int:
+    """Number of decimal digits of num (1 for 0), found by bisecting the powers of 10 table."""
+    while num >= POWERS_OF_10[-1]:
+        POWERS_OF_10.append(POWERS_OF_10[-1] * 10)
+    return bisect_right(POWERS_OF_10, num) or 1
+
+
+def stone_children(num: int) -> Tuple[int, ...]:
+    """Stones which a single stone turns into after one blink."""
+    if num == 0:
+        # rule 1: Replace 0 with 1
+        return (1,)
+    digits = digit_count(num)
+    if digits % 2 == 0:
+        # rule 2: Split into two stones, leading zeros of the right half vanish with integer math
+        return divmod(num, POWERS_OF_10[digits // 2])
+    # rule 3: Multiply by 2024
+    return (num * 2024,)
+
+
+def blink(stones: Counter) -> Counter:
+    """Advances all stones by one blink, stones are kept as {value: multiplicity}."""
+    result = Counter()
+    for num, count in stones.items():
+        for child in stone_children(num):
+            result[child] += count
+    return result
+
+
 def solver(data: ParsedData, blinks: int) -> int:
-    initial_numbers = list(map(int, data.line.split()))
-
-    memo = {}
-
-    def count_stones(num: int, remaining_blinks: int) -> int:
-        if remaining_blinks == 0:
-            return 1
-        key = (num, remaining_blinks)
-        if key in memo:
-            return memo[key]
-
-        if num == 0:
-            # rule 1: Replace 0 with 1
-            result = count_stones(1, remaining_blinks - 1)
-        elif len(str(num)) % 2 == 0:
-            # rule 2: Split into two stones
-            num_str = str(num)
-            half = len(num_str) // 2
-            left_str = num_str[:half].lstrip('0') or '0'
-            right_str = num_str[half:].lstrip('0') or '0'
-            left_num = int(left_str)
-            right_num = int(right_str)
-            result = count_stones(left_num, remaining_blinks - 1) + count_stones(right_num, remaining_blinks - 1)
-        else:
-            # rule 3: Multiply by 2024
-            new_num = num * 2024
-            result = count_stones(new_num, remaining_blinks - 1)
-
-        memo[key] = result
-        return result
-
-    total = 0
-    for num in initial_numbers:
-        total += count_stones(num, blinks)
-
-    return total
+    stones = Counter(map(int, data.line.split()))
+    for _ in range(blinks):
+        stones = blink(stones)
+    return sum(stones.values())
+
+
+class BlinkTransitions:
+    """
+    Closed set of stone values reachable from the seeds, with sparse transitions (children indices) between them.
+    A count vector holds for every value i the number of stones it turns into after k blinks, the next one is
+    counts[i] = sum(prev[j] for j in children[i]). Each blink costs one pass over the transitions (bigint sums).
+    Only every checkpoint_interval-th vector is kept, plus the furthest computed one, so memory is about
+    blinks / checkpoint_interval vectors. A query past the furthest blink continues from it, an earlier one
+    steps at most checkpoint_interval - 1 blinks from the nearest checkpoint.
+    """
+    __slots__ = ["index", "values", "children", "checkpoint_interval", "checkpoints", "frontier", "frontier_blinks"]
+
+    def __init__(self, seeds: Iterable[int], checkpoint_interval: int = 64):
+        self.index: Dict[int, int] = {}
+        self.values: List[int] = []
+        self.children: List[Tuple[int, ...]] = []
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoints: Dict[int, List[int]] = {}
+        self.frontier: List[int] = []
+        self.frontier_blinks = 0
+        self.extend(seeds)
+
+    def extend(self, seeds: Iterable[int]) -> None:
+        """Adds seeds and everything reachable from them to the closure, drops cached counts if it grew."""
+        size = len(self.values)
+        stack = [num for num in seeds if num not in self.index]
+        while stack:
+            num = stack.pop()
+            if num in self.index:
+                continue
+            self.index[num] = len(self.values)
+            self.values.append(num)
+            stack.extend(child for child in stone_children(num) if child not in self.index)
+
+        if size != len(self.values) or not self.checkpoints:
+            self.children = [tuple(self.index[child] for child in stone_children(num)) for num in self.values]
+            self.frontier = [1] * len(self.values)
+            self.frontier_blinks = 0
+            self.checkpoints = {0: self.frontier}
+
+    def step(self, counts: List[int]) -> List[int]:
+        return [sum(counts[j] for j in children) for children in self.children]
+
+    def counts_after(self, blinks: int) -> List[int]:
+        interval = self.checkpoint_interval
+        if blinks >= self.frontier_blinks:
+            counts, done = self.frontier, self.frontier_blinks
+            while done < blinks:
+                counts = self.step(counts)
+                done += 1
+                if done % interval == 0:
+                    self.checkpoints[done] = counts
+            self.frontier, self.frontier_blinks = counts, done
+            return counts
+
+        done = blinks - blinks % interval
+        counts = self.checkpoints[done]
+        while done < blinks:
+            counts = self.step(counts)
+            done += 1
+        return counts
+
+    def stones_after(self, stones: List[int], blinks: int) -> int:
+        self.extend(stones)
+        counts = self.counts_after(blinks)
+        index = self.index
+        return sum(counts[index[num]] for num in stones)
+
+
+def solver_closure(data: ParsedData, blinks: int, transitions: Optional[BlinkTransitions] = None) -> int:
+    """Same as solver, pass a shared BlinkTransitions to reuse computed blinks across queries."""
+    stones = list(map(int, data.line.split()))
+    if transitions is None:
+        transitions = BlinkTransitions(stones)
+    return transitions.stones_after(stones, blinks)
 
 
 def part2(data: ParsedData) -> int:
@@ -79,6 +160,14 @@ def test(part) -> bool:
         all_pass = all_pass and verify_result(part1(parse_input("125 17"), blinks=6), 22, 1)
         all_pass = all_pass and verify_result(part1(parse_input("125 17"), blinks=25), 55312, 1)
 
+    # Test part 2
+    if (part == 2):
+        all_pass = all_pass and verify_result(part2(parse_input("125 17")), 65601038650482, 2)
+        transitions = BlinkTransitions([125, 17])
+        all_pass = all_pass and verify_result(solver_closure(parse_input("125 17"), 75, transitions), 65601038650482, 2)
+        all_pass = all_pass and verify_result(solver_closure(parse_input("125 17"), 25, transitions), 55312, 2)
+        all_pass = all_pass and verify_result(solver_closure(parsed_data, 25, transitions), 125681, 2)
+
     return all_pass
 
 if __name__ == "__main__":
@@ -1,9 +1,17 @@
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from collections import defaultdict
 
 from common import verify_result, run_day, run_tests
 from functools import cmp_to_key
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PART2_OFFSET = 10000000000000
+INT64_MAX = 2 ** 63 - 1
+
 class ParsedData:
     __slots__ = ["machines"]
     def __init__(self):
@@ -48,33 +56,42 @@ def part1(data: ParsedData) -> int:
 
 def part2(data: ParsedData) -> int:
     # Same as part1 excapt that we add 10^13 to each target coordinate.
-    for i, (XA, YA, XB, YB, X_target, Y_target) in enumerate(data.machines):
-        X_target += 10000000000000
-        Y_target += 10000000000000
-        data.machines[i] = (XA, YA, XB, YB, X_target, Y_target)
-
     return solver(data, 2)
 
-def solver(data: ParsedData, part: int) -> int:
-    total_cost = 0
-    winners = 0
+def solver(data: ParsedData, part: int, offset: Optional[int] = None) -> int:
+    """Tokens to win all winnable prizes, with targets shifted by offset (default: 0 or 10^13 by part)."""
+    if offset is None:
+        offset = PART2_OFFSET if part == 2 else 0
+    return solver_offsets(data, [offset])[0]
+
+def solver_offsets(data: ParsedData, offsets: List[int]) -> List[int]:
+    """
+    Total tokens for each of the prize offsets, in one pass over the machines.
+    Determinant depends only on the buttons, so it is computed once per machine and reused for every offset.
+    data.machines are never modified.
+    """
+    totals = [0] * len(offsets)
 
     for (XA, YA, XB, YB, X_target, Y_target) in data.machines:
-        a, b = solve_machine(XA, YA, XB, YB, X_target, Y_target)
-        if a is not None and b is not None and a >= 0 and b >= 0:
-            cost = 3*a + b
-            winners += 1
-            total_cost += cost
+        det = XA*YB - XB*YA
+        if det == 0:
+            continue
+        for k, offset in enumerate(offsets):
+            a, b = solve_machine(XA, YA, XB, YB, X_target + offset, Y_target + offset, det)
+            if a is not None and b is not None and a >= 0 and b >= 0:
+                totals[k] += 3*a + b
 
-    return total_cost
+    return totals
 
-def solve_machine(XA: int, YA: int, XB: int, YB: int, X_target: int, Y_target: int) -> Tuple:
+def solve_machine(XA: int, YA: int, XB: int, YB: int, X_target: int, Y_target: int,
+                  det: Optional[int] = None) -> Tuple:
     # Solve the system of equations:
     # XA*a + XB*b = X_target
     # YA*a + YB*b = Y_target
     #
-    # Using Cramer's rule:
-    det = XA*YB - XB*YA
+    # Using Cramer's rule (det can be passed in when the same buttons are solved for many targets):
+    if det is None:
+        det = XA*YB - XB*YA
     if det == 0:
         return None, None
 
@@ -90,6 +107,59 @@ def solve_machine(XA: int, YA: int, XB: int, YB: int, X_target: int, Y_target: i
     b = detB // det
     return a, b
 
+def machines_array(machines: List[Tuple[int, int, int, int, int, int]], max_offset: int = 0):
+    """
+    Machines as (N, 6) array of (XA, YA, XB, YB, X_target, Y_target).
+    Uses int64 when no determinant, numerator or cost can overflow it for targets shifted by up to max_offset,
+    python ints (object) otherwise.
+    """
+    try:
+        array = np.array(machines, dtype=np.int64).reshape(-1, 6)
+    except OverflowError:
+        array = np.array(machines, dtype=object).reshape(-1, 6)
+    if len(array):
+        max_button = int(abs(array[:, :4]).max())
+        max_target = int(abs(array[:, 4:]).max()) + abs(max_offset)
+        # |detA|, |detB| <= 2 * max_target * max_button, and 3a + b <= 4 * that for every machine.
+        if array.dtype != object and 8 * max(max_target, max_button) * max_button > INT64_MAX:
+            array = array.astype(object)
+    return array
+
+def batch_tokens(machines, offsets: List[int]) -> List[int]:
+    """
+    Vectorized solve_machine over all machines, returns tokens needed to win every winnable prize
+    for each offset. Determinants are computed once and reused for all offsets.
+    """
+    XA, YA, XB, YB, X_base, Y_base = machines.T
+    det = XA*YB - XB*YA
+    nonzero = det != 0
+    det_safe = np.where(nonzero, det, 1)
+
+    totals = []
+    for offset in offsets:
+        X_target, Y_target = X_base + offset, Y_base + offset
+        detA = X_target*YB - XB*Y_target
+        detB = XA*Y_target - X_target*YA
+
+        winnable = nonzero & (detA % det_safe == 0) & (detB % det_safe == 0)
+        a = detA // det_safe
+        b = detB // det_safe
+        winnable &= (a >= 0) & (b >= 0)
+        costs = (3*a + b)[winnable]
+        if costs.dtype == object:
+            totals.append(int(costs.sum()))
+        else:
+            # Sum of many int64 costs may still overflow, sum high and low 32 bits separately.
+            totals.append((int((costs >> 32).sum()) << 32) + int((costs & 0xFFFFFFFF).sum()))
+    return totals
+
+def batch_solver(data: ParsedData, offsets: Optional[List[int]] = None) -> List[int]:
+    """Total tokens for each offset (part 1 and part 2 by default) in one call, using whole-array operations."""
+    if offsets is None:
+        offsets = [0, PART2_OFFSET]
+    machines = machines_array(data.machines, max((abs(o) for o in offsets), default=0))
+    return batch_tokens(machines, offsets)
+
 def solve(data: str, part: int = 1) -> int:
     parsed_data = parse_input(data)
     return part1(parsed_data) if part == 1 else part2(parsed_data)
@@ -114,12 +184,20 @@ Prize: X=18641, Y=10279
 """
     parsed_data = parse_input(test_input)
     if part == 1:
-        return verify_result(part1(parsed_data), 480, 1)
+        all_pass = verify_result(part1(parsed_data), 480, 1)
+        if np is not None:
+            all_pass = verify_result(batch_solver(parsed_data)[0], 480, 1) and all_pass
+        return all_pass
     else:
-       # no expected result for part 2 provided
-       pass;
-
-    return True
+        # no expected result for part 2 provided, check that parts can run repeatedly on the same data
+        # and that all solvers agree
+        part2_result = part2(parsed_data)
+        all_pass = verify_result(part2(parsed_data), part2_result, 2)
+        all_pass = verify_result(part1(parsed_data), 480, 2) and all_pass
+        all_pass = verify_result(solver_offsets(parsed_data, [0, PART2_OFFSET]), [480, part2_result], 2) and all_pass
+        if np is not None:
+            all_pass = verify_result(batch_solver(parsed_data), [480, part2_result], 2) and all_pass
+        return all_pass
 
 if __name__ == "__main__":
     run_tests(13)
@@ -1,6 +1,20 @@
-from typing import List, Tuple
+import heapq
+from abc import ABC, abstractmethod
+from math import gcd
+from random import Random
+from typing import List, Optional, Tuple, Union
 from common import run_tests, run_day, verify_result
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from scipy import ndimage
+except ImportError:
+    ndimage = None
+
 
 class ParsedData:
     __slots__ = ["robots"]
@@ -27,11 +41,48 @@ def parse_input(data: str) -> ParsedData:
         result.robots.append((x, y, dx, dy))
     return result
 
+class RobotArrays:
+    """Robots as four int64 arrays, positions of the whole swarm are computed with array math."""
+    __slots__ = ["x", "y", "dx", "dy"]
+
+    def __init__(self, robots: List[Tuple[int, int, int, int]]):
+        columns = np.array(robots, dtype=np.int64).reshape(-1, 4).T
+        self.x, self.y, self.dx, self.dy = (np.ascontiguousarray(c) for c in columns)
+
+    def positions(self, t, width: int, height: int):
+        """
+        (xs, ys) at time t. t can also be an array of times, then result rows correspond to its entries.
+        Times, positions and velocities are reduced modulo the axis size first (positions repeat with it),
+        so products stay below the axis size squared however large the input velocities are.
+        """
+        t = np.asarray(t, dtype=np.int64)
+        tx = (t % width)[..., None]
+        ty = (t % height)[..., None]
+        xs = (self.x % width + tx * (self.dx % width)) % width
+        ys = (self.y % height + ty * (self.dy % height)) % height
+        return xs, ys
+
+def quadrant_product_numpy(xs, ys, width: int, height: int) -> int:
+    center_x, center_y = width // 2, height // 2
+    # Robots exactly on the center lines are not counted
+    counted = (xs != center_x) & (ys != center_y)
+    codes = (xs > center_x).astype(np.int64) + 2 * (ys > center_y)
+    quadrants = np.bincount(codes[counted], minlength=4)
+    return int(np.prod(quadrants.astype(object)))
+
+def has_overlap_numpy(xs, ys, width: int) -> bool:
+    return np.unique(ys.astype(np.int64) * width + xs).size < xs.size
+
 def bounding_box(robots: List[Tuple[int, int, int, int]], t: int, width, height):
-    xs = [(x + dx * t)%width for (x, y, dx, dy) in robots]
-    ys = [(y + dy * t)%height for (x, y, dx, dy) in robots]
-    min_x, max_x = min(xs), max(xs)
-    min_y, max_y = min(ys), max(ys)
+    if np is not None:
+        xs, ys = RobotArrays(robots).positions(t, width, height)
+        min_x, max_x = int(xs.min()), int(xs.max())
+        min_y, max_y = int(ys.min()), int(ys.max())
+    else:
+        xs = [(x + dx * t)%width for (x, y, dx, dy) in robots]
+        ys = [(y + dy * t)%height for (x, y, dx, dy) in robots]
+        min_x, max_x = min(xs), max(xs)
+        min_y, max_y = min(ys), max(ys)
     area = (max_x - min_x) * (max_y - min_y)
     return area, min_x, max_x, min_y, max_y
 
@@ -51,60 +102,229 @@ def print_pattern(robots: List[Tuple[int, int, int, int]], t: int, width, height
     for row in grid:
         print("".join(row))
 
+def axis_clustering_time(positions: List[int], velocities: List[int], period: int) -> int:
+    """
+    Time in [0, period) at which robots are most clustered along one axis (minimal variance).
+    Positions along an axis repeat with the axis size, so one period covers every possible arrangement.
+    """
+    n = len(positions)
+    best_t, best_score = 0, None
+    for t in range(period):
+        coords = [(p + v * t) % period for p, v in zip(positions, velocities)]
+        # n^2 * variance, kept in integers
+        score = n * sum(c * c for c in coords) - sum(coords) ** 2
+        if best_score is None or score < best_score:
+            best_t, best_score = t, score
+    return best_t
+
+def axis_clustering_time_numpy(positions, velocities, period: int, chunk_cells: int = 1 << 24) -> int:
+    """Vectorized axis_clustering_time, times of the period are evaluated in 2D blocks of at most chunk_cells."""
+    n = positions.size
+    # Reduced so t * velocity stays below period squared
+    positions, velocities = positions % period, velocities % period
+    times_per_chunk = max(chunk_cells // max(n, 1), 1)
+    best_t, best_score = 0, None
+    for start in range(0, period, times_per_chunk):
+        t = np.arange(start, min(start + times_per_chunk, period), dtype=np.int64)[:, None]
+        coords = ((positions + t * velocities) % period).astype(np.int64)
+        # n^2 * variance, kept in integers so ties resolve the same way as in axis_clustering_time
+        score = n * (coords * coords).sum(axis=1) - coords.sum(axis=1) ** 2
+        i = int(score.argmin())
+        if best_score is None or score[i] < best_score:
+            best_t, best_score = start + i, int(score[i])
+    return best_t
+
+def crt(a1: int, m1: int, a2: int, m2: int) -> Optional[Tuple[int, int]]:
+    """Solves t = a1 (mod m1), t = a2 (mod m2). Returns (t, lcm(m1, m2)) or None if there is no solution."""
+    g = gcd(m1, m2)
+    if (a2 - a1) % g != 0:
+        return None
+    lcm = m1 // g * m2
+    # t = a1 + m1 * k, where m1 * k = a2 - a1 (mod m2)
+    k = ((a2 - a1) // g * pow(m1 // g, -1, m2 // g)) % (m2 // g)
+    return (a1 + m1 * k) % lcm, lcm
+
 def find_christmas_tree_time(robots: List[Tuple[int, int, int, int]], width: int, height: int) -> int:
-    safety_cutoff = 200000000
+    """
+    The picture shows up when robots cluster on both axes at once. x positions repeat every width steps
+    and y positions every height steps, so each axis is searched separately within its period and both
+    times are combined with the Chinese Remainder Theorem: O((W + H) * N) instead of O(W * H * N).
+    """
+    if np is not None:
+        arrays = RobotArrays(robots)
+        t_x = axis_clustering_time_numpy(arrays.x, arrays.dx, width)
+        t_y = axis_clustering_time_numpy(arrays.y, arrays.dy, height)
+    else:
+        t_x = axis_clustering_time([r[0] for r in robots], [r[2] for r in robots], width)
+        t_y = axis_clustering_time([r[1] for r in robots], [r[3] for r in robots], height)
+    solution = crt(t_x, width, t_y, height)
+    if solution is None:
+        return 0
+    t, period = solution
+    # Search used to start at t = 1, the initial arrangement shows up again after a full period.
+    return t if t > 0 else period
 
-    map_dict = {}
-    for t in range(1, safety_cutoff, 1):
-        same_position_count = 0
-        for (x, y, dx, dy) in robots:
-            final_x = (x + t * dx) % width
-            final_y = (y + t * dy) % height
-            if (final_x, final_y) in map_dict and map_dict[(final_x, final_y)] == t:
-                same_position_count += 1
-                break
-            map_dict[(final_x, final_y)] = t
-        if same_position_count == 0:
 
-            # Gives correct result, but visually does not look like a Christmas tree at all
-            #print_pattern(robots, t, width, height)
-            #for t2 in range(t, t+30):
-            #    print(f"Time = {t2}")
-            #    print_pattern(robots, t2, width, height)
+class FrameDetector(ABC):
+    """
+    Scores a frame of robot positions (xs, ys arrays), higher score means the frame is more likely the picture.
+    Subclasses implement score and register under their name in DETECTORS, detectors need NumPy.
+    """
+    name = "detector"
 
-            return t
-    return 0
+    @abstractmethod
+    def score(self, xs, ys, width: int, height: int) -> float:
+        ...
 
+class NoOverlapDetector(FrameDetector):
+    """Original heuristic: 1 when no two robots share a cell, 0 otherwise."""
+    name = "no-overlap"
 
-def solver(data: ParsedData, part: int, width: int, height: 103) -> int:
+    def score(self, xs, ys, width: int, height: int) -> float:
+        return 0.0 if has_overlap_numpy(xs, ys, width) else 1.0
 
-    if part == 1:
-        # Part 1: Calculate the safety factor after 100 seconds
-        center_x = width // 2  # 50
-        center_y = height // 2  # 51
-        time = 100
+class VarianceDetector(FrameDetector):
+    """Robots gathered in a picture have small spread on both axes."""
+    name = "variance"
+
+    def score(self, xs, ys, width: int, height: int) -> float:
+        return -float(xs.var() + ys.var())
+
+class EntropyDetector(FrameDetector):
+    """Shannon entropy of robot counts over block x block tiles, a structured frame has low entropy."""
+    name = "entropy"
+
+    def __init__(self, block: int = 5):
+        self.block = block
+
+    def score(self, xs, ys, width: int, height: int) -> float:
+        tiles_per_row = (width + self.block - 1) // self.block
+        tiles = (ys // self.block).astype(np.int64) * tiles_per_row + xs // self.block
+        counts = np.bincount(tiles)
+        p = counts[counts > 0] / xs.size
+        return float((p * np.log(p)).sum())
+
+class LongestRunDetector(FrameDetector):
+    """Longest horizontal run of occupied cells, pictures have long straight lines."""
+    name = "longest-run"
 
-        Q1 = Q2 = Q3 = Q4 = 0
+    def score(self, xs, ys, width: int, height: int) -> float:
+        # Empty column on both sides of every row, so runs never continue into the next row
+        occupied = np.zeros((height, width + 2), dtype=np.int8)
+        occupied[ys, xs + 1] = 1
+        edges = np.diff(occupied.ravel())
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        return float((ends - starts).max()) if starts.size else 0.0
 
-        for (x, y, dx, dy) in data.robots:
-            final_x = (x + time * dx) % width
-            final_y = (y + time * dy) % height
+class ComponentDetector(FrameDetector):
+    """Size (in cells) of the largest 4-connected group of occupied cells."""
+    name = "component"
 
-            if final_x == center_x or final_y == center_y:
-                continue  # Robots exactly on the center lines are not counted
+    def score(self, xs, ys, width: int, height: int) -> float:
+        if ndimage is not None:
+            occupied = np.zeros((height, width), dtype=bool)
+            occupied[ys, xs] = True
+            labels, count = ndimage.label(occupied)
+            return float(np.bincount(labels.ravel())[1:].max()) if count else 0.0
 
-            if final_x > center_x and final_y < center_y:
-                Q1 += 1
-            elif final_x < center_x and final_y < center_y:
-                Q2 += 1
-            elif final_x < center_x and final_y > center_y:
-                Q3 += 1
-            elif final_x > center_x and final_y > center_y:
-                Q4 += 1
+        cells = set(zip(xs.tolist(), ys.tolist()))
+        best = 0
+        while cells:
+            stack = [cells.pop()]
+            size = 0
+            while stack:
+                x, y = stack.pop()
+                size += 1
+                for n in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                    if n in cells:
+                        cells.remove(n)
+                        stack.append(n)
+            best = max(best, size)
+        return float(best)
 
-        return Q1 * Q2 * Q3 * Q4
+DETECTORS = {d.name: d for d in (NoOverlapDetector, VarianceDetector, EntropyDetector, LongestRunDetector, ComponentDetector)}
+
+def find_pattern_times(robots: List[Tuple[int, int, int, int]], width: int, height: int,
+                       detector: Union[FrameDetector, str],
+                       top_k: int = 1, threshold: Optional[float] = None,
+                       max_time: Optional[int] = None) -> List[Tuple[int, float]]:
+    """
+    Scores frames t = 1..max_time (default: one full period, lcm(width, height)) and returns the top_k
+    (time, score) pairs, best first. Positions are advanced incrementally by one step per frame.
+    With threshold, the search stops at the first frame scoring at least threshold and returns it alone.
+    detector is an instance or a name from DETECTORS (created with default arguments).
+    """
+    if np is None:
+        raise ImportError("find_pattern_times needs NumPy")
+    if isinstance(detector, str):
+        if detector not in DETECTORS:
+            raise ValueError(f"Unknown detector '{detector}', available: {', '.join(DETECTORS)}")
+        detector = DETECTORS[detector]()
+    if max_time is None:
+        max_time = width // gcd(width, height) * height
+
+    arrays = RobotArrays(robots)
+    xs, ys = arrays.positions(0, width, height)
+    step_x, step_y = arrays.dx % width, arrays.dy % height
+
+    best: List[Tuple[float, int]] = []  # min-heap of (score, -t), so earlier times win ties
+    for t in range(1, max_time + 1):
+        xs += step_x
+        xs[xs >= width] -= width
+        ys += step_y
+        ys[ys >= height] -= height
+
+        score = detector.score(xs, ys, width, height)
+        if threshold is not None and score >= threshold:
+            return [(t, score)]
+        if len(best) < top_k:
+            heapq.heappush(best, (score, -t))
+        elif (score, -t) > best[0]:
+            heapq.heapreplace(best, (score, -t))
+
+    return [(-neg_t, score) for score, neg_t in sorted(best, reverse=True)]
+
+def safety_factor(robots: List[Tuple[int, int, int, int]], width: int, height: int, time: int = 100) -> int:
+    if np is not None:
+        xs, ys = RobotArrays(robots).positions(time, width, height)
+        return quadrant_product_numpy(xs, ys, width, height)
+    return safety_factor_python(robots, width, height, time)
+
+def safety_factor_python(robots: List[Tuple[int, int, int, int]], width: int, height: int, time: int = 100) -> int:
+    center_x = width // 2  # 50
+    center_y = height // 2  # 51
+
+    Q1 = Q2 = Q3 = Q4 = 0
+
+    for (x, y, dx, dy) in robots:
+        final_x = (x + time * dx) % width
+        final_y = (y + time * dy) % height
+
+        if final_x == center_x or final_y == center_y:
+            continue  # Robots exactly on the center lines are not counted
+
+        if final_x > center_x and final_y < center_y:
+            Q1 += 1
+        elif final_x < center_x and final_y < center_y:
+            Q2 += 1
+        elif final_x < center_x and final_y > center_y:
+            Q3 += 1
+        elif final_x > center_x and final_y > center_y:
+            Q4 += 1
+
+    return Q1 * Q2 * Q3 * Q4
+
+def solver(data: ParsedData, part: int, width: int, height: 103, detector: Optional[str] = None) -> int:
+
+    if part == 1:
+        # Part 1: Calculate the safety factor after 100 seconds
+        return safety_factor(data.robots, width, height, 100)
     else:
-        # Part 2: Find the time when the robots form the Easter egg pattern
+        # Part 2: Find the time when the robots form the Easter egg pattern, by default per axis with CRT,
+        # or frame by frame with the named detector from DETECTORS
+        if detector is not None:
+            return find_pattern_times(data.robots, width, height, detector)[0][0]
         best_t = find_christmas_tree_time(data.robots, width, height)
         return best_t
 
@@ -113,8 +333,8 @@ def part1(data: ParsedData, width: int, height: int) -> int:
     return solver(data, 1, width, height)
 
 
-def part2(data: ParsedData, width: int, height: int) -> int:
-    return solver(data, 2, width, height)
+def part2(data: ParsedData, width: int, height: int, detector: Optional[str] = None) -> int:
+    return solver(data, 2, width, height, detector)
 
 
 def solve(data: str, part: int = 1) -> int:
@@ -139,8 +359,43 @@ p=9,5 v=-3,-3
 """.strip()
 
     if part == 1:
-        return verify_result(part1(parse_input(test_input), width=11, height=7), 12, 1)
-    return True
+        all_pass = verify_result(part1(parse_input(test_input), width=11, height=7), 12, 1)
+        all_pass = verify_result(safety_factor_python(parse_input(test_input).robots, 11, 7), 12, 1) and all_pass
+        if np is not None:
+            # Velocities far beyond the grid size must not overflow
+            xs, ys = RobotArrays([(0, 0, 2 * 10**9, 2 * 10**9), (81, 84, 0, 0)]).positions(100, 101, 103)
+            all_pass = verify_result((int(xs[0]), int(ys[0])), (81, 84), 1) and all_pass
+            all_pass = verify_result(has_overlap_numpy(xs, ys, 101), True, 1) and all_pass
+        return all_pass
+
+    # Example has no picture in it, so generate robots which all meet in a small square at t = 1234.
+    rng = Random(14)
+    robots = []
+    for _ in range(200):
+        dx, dy = rng.randint(-100, 100), rng.randint(-100, 100)
+        x, y = 40 + rng.randint(0, 9), 50 + rng.randint(0, 9)
+        robots.append(((x - dx * 1234) % 101, (y - dy * 1234) % 103, dx, dy))
+    lines = "\n".join(f"p={x},{y} v={dx},{dy}" for x, y, dx, dy in robots)
+    all_pass = verify_result(part2(parse_input(lines), width=101, height=103), 1234, 2)
+
+    if np is not None:
+        # Smaller grid (period 31 * 37) for the frame by frame detectors, robots fill a 6x6 square at t = 500.
+        robots = []
+        for i in range(36):
+            dx, dy = rng.randint(-30, 30), rng.randint(-36, 36)
+            x, y = 10 + i % 6, 20 + i // 6
+            robots.append(((x - dx * 500) % 31, (y - dy * 500) % 37, dx, dy))
+        top = find_pattern_times(robots, 31, 37, VarianceDetector(), top_k=3)
+        all_pass = verify_result(len(top), 3, 2) and verify_result(top[0][0], 500, 2) and all_pass
+        for detector in (EntropyDetector(), ComponentDetector()):
+            all_pass = verify_result(find_pattern_times(robots, 31, 37, detector)[0][0], 500, 2) and all_pass
+        # Detector selected by name for part 2
+        swarm = ParsedData()
+        swarm.robots = robots
+        all_pass = verify_result(part2(swarm, 31, 37, detector="entropy"), 500, 2) and all_pass
+        # Early exit: a full row of the square is the first run of 6
+        all_pass = verify_result(find_pattern_times(robots, 31, 37, LongestRunDetector(), threshold=6)[0][0], 500, 2) and all_pass
+    return all_pass
 
 if __name__ == "__main__":
     run_tests(14)
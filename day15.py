@@ -1,13 +1,16 @@
-from typing import List, Tuple
+import io
+import struct
+from typing import Callable, Iterable, Iterator, List, Optional, TextIO, Tuple
 
 from common import run_tests, run_day, verify_result
 
 class ParsedData:
-    __slots__ = ["map_lines", "moves_str"]
+    __slots__ = ["map_lines", "moves_chunks"]
 
     def __init__(self):
-        self.map_lines = []
-        self.moves_str = []
+        self.map_lines: List[str] = []
+        # Move lines as they come in the input, whitespace and newlines are skipped by the simulation.
+        self.moves_chunks: List[str] = []
 
 def parse_input(data: str) -> 'ParsedData':
     result: ParsedData = ParsedData()
@@ -26,210 +29,260 @@ def parse_input(data: str) -> 'ParsedData':
         assert False, "Invalid input"
     else:
         result.map_lines = all_lines[:blank_line_index]
-        moves_lines = all_lines[blank_line_index+1:]
-        result.moves_str = "".join(moves_lines)
-        result.moves_str = result.moves_str.replace(" ", "")
+        result.moves_chunks = all_lines[blank_line_index+1:]
 
     return result
 
+def read_stream(fp: TextIO, chunk_size: int = 1 << 16) -> Tuple[List[str], Iterator[str]]:
+    """
+    Reads the map from a text stream up to the first blank line. Returns map lines and an iterator which
+    reads the moves lazily in chunks of chunk_size characters, so the move tape is never held in memory.
+    """
+    map_lines = []
+    while True:
+        line = fp.readline()
+        if not line.strip():
+            break
+        map_lines.append(line.rstrip())
+
+    def chunks() -> Iterator[str]:
+        while True:
+            chunk = fp.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    return map_lines, chunks()
+
 def part1(data: ParsedData) -> int:
     return solver(data, 1)
 
 def part2(data: ParsedData) -> int:
     return solver(data, 2)
 
+# Cell codes of the warehouse grid. Robot is not stored in the grid, its cell is floor.
+FLOOR, WALL, BOX, BOX_LEFT, BOX_RIGHT = range(5)
+CELL_CODES = {'.': FLOOR, '#': WALL, 'O': BOX, '[': BOX_LEFT, ']': BOX_RIGHT, '@': FLOOR}
+CELL_CHARS = '.#O[]'
+
+class Warehouse:
+    """
+    Warehouse as a flat bytearray of cell codes, cell (r, c) is at index (r + 1) * width + c + 1. The map is
+    padded with a ring of walls, so moves never need bounds checks (outside of the map behaves as a wall).
+    """
+    __slots__ = ["cells", "width", "height", "robot", "moves", "gps", "steps", "gps_steps", "stamps", "stamp"]
+
+    # Checkpoint header: width, height, robot index, number of executed moves.
+    CHECKPOINT_HEADER = struct.Struct("<IIqQ")
+
+    def __init__(self, map_lines: List[str]):
+        self.width = max((len(line) for line in map_lines), default=0) + 2
+        self.height = len(map_lines) + 2
+        self.cells = bytearray([WALL]) * (self.width * self.height)
+        self.robot = -1
+        self.moves = 0
+        for r, line in enumerate(map_lines):
+            for c, ch in enumerate(line):
+                idx = (r + 1) * self.width + c + 1
+                self.cells[idx] = CELL_CODES.get(ch, FLOOR)
+                if ch == '@':
+                    self.robot = idx
+        self.init_move_state()
+
+    def init_move_state(self) -> None:
+        self.steps = {'^': -self.width, 'v': self.width, '<': -1, '>': 1}
+        # Change of a box GPS coordinate when it moves by a step.
+        self.gps_steps = {-self.width: -100, self.width: 100, -1: -1, 1: 1}
+        # Sum of GPS coordinates of all boxes, kept up to date by the push routines.
+        self.gps = sum_boxes(self, 1) + sum_boxes(self, 2)
+        # Visited marks for part 2 pushes, a new stamp value per push avoids clearing the array.
+        self.stamps = [0] * len(self.cells)
+        self.stamp = 0
+
+    def checkpoint(self) -> bytes:
+        """Serialized state, restore() continues the simulation from it."""
+        return self.CHECKPOINT_HEADER.pack(self.width, self.height, self.robot, self.moves) + bytes(self.cells)
+
+    @classmethod
+    def restore(cls, checkpoint: bytes) -> 'Warehouse':
+        warehouse = cls.__new__(cls)
+        header_size = cls.CHECKPOINT_HEADER.size
+        warehouse.width, warehouse.height, warehouse.robot, warehouse.moves = \
+            cls.CHECKPOINT_HEADER.unpack(checkpoint[:header_size])
+        warehouse.cells = bytearray(checkpoint[header_size:])
+        warehouse.init_move_state()
+        return warehouse
+
+    def to_lines(self) -> List[str]:
+        lines = []
+        for r in range(1, self.height - 1):
+            row = [CELL_CHARS[code] for code in self.cells[r * self.width + 1:(r + 1) * self.width - 1]]
+            if self.robot // self.width == r:
+                row[self.robot % self.width - 1] = '@'
+            lines.append("".join(row))
+        return lines
+
+    def move(self, move: str) -> None:
+        self.moves += 1
+        if self.robot < 0:
+            return
+        step = self.steps[move]
+        target = self.robot + step
+        cell = self.cells[target]
+        if cell == FLOOR:
+            self.robot = target
+        elif cell == BOX:
+            if push_boxes_part1(self, target, step):
+                self.robot = target
+        elif cell != WALL:
+            if push_boxes_part2(self, target, step):
+                self.robot = target
+
+def simulate(warehouse: Warehouse, move_chunks: Iterable[str], skip: int = 0,
+             progress: Optional[Callable[[Warehouse], None]] = None, progress_interval: int = 100000,
+             checkpoint: Optional[Callable[[bytes], None]] = None, checkpoint_interval: int = 0) -> Warehouse:
+    """
+    Executes moves from move_chunks (any iterable of strings, e.g. lines or chunks read from a file),
+    characters other than move arrows are ignored. The first skip moves are not executed, pass
+    warehouse.moves of a restored checkpoint to resume with the same tape. progress gets the warehouse every
+    progress_interval moves, checkpoint gets serialized state every checkpoint_interval moves.
+    """
+    steps = warehouse.steps
+    for chunk in move_chunks:
+        for move in chunk:
+            if move not in steps:
+                continue
+            if skip > 0:
+                skip -= 1
+                continue
+            warehouse.move(move)
+            if progress is not None and warehouse.moves % progress_interval == 0:
+                progress(warehouse)
+            if checkpoint is not None and checkpoint_interval > 0 and warehouse.moves % checkpoint_interval == 0:
+                checkpoint(warehouse.checkpoint())
+    return warehouse
+
 def solver(data: ParsedData, part: int) -> int:
     map_lines = data.map_lines
-    moves_str = data.moves_str
 
     # If part 2, scale the map
     if part == 2:
         map_lines = scale_map(map_lines)
 
-    warehouse = [list(row) for row in map_lines]
-    rows = len(warehouse)
-    cols = len(warehouse[0]) if rows > 0 else 0
+    warehouse = simulate(Warehouse(map_lines), data.moves_chunks)
+    return warehouse.gps
 
-    # Find robot position '@'
-    robot_r, robot_c = None, None
-    for r in range(rows):
-        for c in range(cols):
-            if warehouse[r][c] == '@':
-                robot_r, robot_c = r, c
-                break
-        if robot_r is not None:
-            break
-
-    deltas = {
-        '^': (-1, 0),
-        'v': (1, 0),
-        '<': (0, -1),
-        '>': (0, 1)
-    }
-
-    print("")
-    iter = 0
-    AllowPrint = False
-
-    # Run simulation
-    for move in moves_str:
-        dr, dc = deltas[move]
-        new_r = robot_r + dr
-        new_c = robot_c + dc
-
-        if not (0 <= new_r < rows and 0 <= new_c < cols):
-            # Out of range move
-            continue
-
-        target_cell = warehouse[new_r][new_c]
-
-        if part == 2 and AllowPrint:
-            # print map
-            if iter == 5:
-                pass
-            print(f"{iter}# Move: {move}:")
-            for row in warehouse:
-                print("".join(row))
-            print("")
-            iter += 1
-
-        if target_cell == '#':
-            # Wall, no move
-            continue
-        elif target_cell == '.':
-            warehouse[robot_r][robot_c] = '.'  # old cell becomes floor
-            warehouse[new_r][new_c] = '@'
-            robot_r, robot_c = new_r, new_c
-        else:
-            # Encounter box(es)
-            can_push = False
-            if part == 1:
-                # Part 1 pushing logic
-                if target_cell == 'O':
-                    can_push = push_boxes_part1(warehouse, robot_r, robot_c, dr, dc)
-            else:
-                # Part 2 pushing logic
-                if target_cell == '[' or target_cell == ']':
-                    can_push = push_boxes_part2(warehouse, robot_r, robot_c, dr, dc)
-            if can_push:
-                    warehouse[robot_r][robot_c] = '.'  # Clear '@'
-                    warehouse[robot_r + dr][robot_c + dc] = '@'
-                    robot_r += dr
-                    robot_c += dc
-
-    if part == 2 and AllowPrint:
-        # print map
-        if iter == 5:
-            pass
-        print(f"{iter}# Move: {move}:")
-        for row in warehouse:
-            print("".join(row))
-        print("")
-        iter += 1
-
-    return sum_boxes(warehouse, part)
-
-def push_boxes_part1(warehouse: List[List[str]], robot_r: int, robot_c: int, dr: int, dc: int) -> bool:
-    # Push logic for part 1 (single cell boxes 'O')
-    rows = len(warehouse)
-    cols = len(warehouse[0]) if rows > 0 else 0
-
-    # Gather consecutive boxes
-    check_r = robot_r + dr
-    check_c = robot_c + dc
-    boxes = []
-    while 0 <= check_r < rows and 0 <= check_c < cols:
-        if warehouse[check_r][check_c] == 'O':
-            boxes.append((check_r, check_c))
-            check_r += dr
-            check_c += dc
-        else:
+def solve_stream(fp: TextIO, part: int, chunk_size: int = 1 << 16, **simulate_args) -> int:
+    """Same as solve, but the input is read from a text stream with the moves processed chunk by chunk."""
+    map_lines, move_chunks = read_stream(fp, chunk_size)
+    if part == 2:
+        map_lines = scale_map(map_lines)
+    warehouse = simulate(Warehouse(map_lines), move_chunks, **simulate_args)
+    return warehouse.gps
+
+def sample_gps(warehouse: Warehouse, move_chunks: Iterable[str], sample_moves: Iterable[int]) -> List[Optional[int]]:
+    """
+    GPS sum after each of the given numbers of executed moves (0 is the state before the first move),
+    in the order given. move_chunks is the whole tape, for a restored checkpoint its first warehouse.moves
+    moves are skipped like simulate(skip=...) does. Simulation stops after the last requested sample,
+    samples before the warehouse state (already executed moves) or past the end of the tape are None.
+    """
+    sample_moves = list(sample_moves)
+    skip = warehouse.moves
+    pending = sorted({m for m in sample_moves if m >= skip}, reverse=True)
+    samples = {}
+    if pending and pending[-1] == skip:
+        samples[pending.pop()] = warehouse.gps
+
+    steps = warehouse.steps
+    for chunk in move_chunks:
+        if not pending:
             break
-
-    if not (0 <= check_r < rows and 0 <= check_c < cols):
-        # Out of range, can't push
-        return False
-    if warehouse[check_r][check_c] != '.':
-        # Not empty, can't push
+        for move in chunk:
+            if move not in steps:
+                continue
+            if skip > 0:
+                skip -= 1
+                continue
+            warehouse.move(move)
+            while pending and pending[-1] == warehouse.moves:
+                samples[pending.pop()] = warehouse.gps
+            if not pending:
+                break
+    return [samples.get(m) for m in sample_moves]
+
+def push_boxes_part1(warehouse: Warehouse, target: int, step: int) -> bool:
+    # Push logic for part 1 (single cell boxes 'O'). Row of boxes moved by one cell looks the same
+    # except for its ends: first box cell becomes floor (robot moves there) and the floor behind the
+    # last box becomes a box.
+    cells = warehouse.cells
+    end = target
+    while cells[end] == BOX:
+        end += step
+    if cells[end] != FLOOR:
+        # Wall, can't push
         return False
-
-    # We can push
-    # Clear robot old cell
-    warehouse[robot_r][robot_c] = '.'
-    # Move boxes from last to first
-    for br, bc in reversed(boxes):
-        warehouse[br + dr][bc + dc] = 'O'
-        warehouse[br][bc] = '.'
-    # Move robot into first box's old position
-    warehouse[robot_r + dr][robot_c + dc] = '@'
+    cells[end] = BOX
+    cells[target] = FLOOR
+    warehouse.gps += (end - target) // step * warehouse.gps_steps[step]
     return True
 
-def push_boxes_part2(warehouse: List[List[str]], robot_r: int, robot_c: int, dr: int, dc: int) -> bool:
+def push_boxes_part2(warehouse: Warehouse, target: int, step: int) -> bool:
     # Push logic for part 2 (two-cell boxes '[]')
-
-    # Recursively check if a a box can be moved at given point. Robot is represented by one point
-    # while a box-s move is represented by two points. This aproach could also be used in part 1.
-
-    def try_move_boxes(move_points: List[Tuple[int,int]]) -> Tuple[bool, List[Tuple[int,int]]]:
-
-        # find all boxes that are colliding with the robot, return a tuple with bool as first value
-        # indicating if a move is possible - ie. if a wall was encountered at some resurse level. If true
-        # is returned then all the boxes which were found to be moved, along the resurce descent, are returned in second
-        # tuple element
-
-        boxes_to_be_moved = []
-        # Iterate all the move points
-        for mp_r, mp_c in move_points:
-            mp_boxes_to_be_moved = []
-
-            # If wall, then return down the recursive call tree that this move is blocked.
-            if warehouse[mp_r][mp_c] == '#':
-                return False, []
-            if warehouse[mp_r][mp_c] == '.':
-                continue
-
-            # Move encounters a box, we will resursively check if moving it is possible and which (if any) new box
-            # moves it creates.
-            if warehouse[mp_r][mp_c] == '[' or warehouse[mp_r][mp_c] == ']':
-
-                #ab_r ab_c repesent one box position always by its left side.
-                ab_r, ab_c = mp_r, mp_c + (-1 if warehouse[mp_r][mp_c] == ']' else 0)
-
-                if dc != 0:
-                    # For horizontal movement single point is generated. It must also be aligned to direction of move.
-                    new_move_points = [(ab_r, ab_c + dc + (0 if dc < 0 else 1))]
+    cells = warehouse.cells
+
+    if step == 1 or step == -1:
+        # Horizontal push, boxes form a single row which is shifted by one cell.
+        end = target
+        while cells[end] == BOX_LEFT or cells[end] == BOX_RIGHT:
+            end += step
+        if cells[end] != FLOOR:
+            return False
+        if step == 1:
+            cells[target + 1:end + 1] = cells[target:end]
+        else:
+            cells[end:target] = cells[end + 1:target + 1]
+        cells[target] = FLOOR
+        # Each box covers two of the shifted cells
+        warehouse.gps += (end - target) // 2
+        return True
+
+    # Vertical push, boxes touched by the push are found level by level (BFS frontier). Each box is
+    # represented by its left cell and marked in stamps, so a box pushed by two boxes is moved once.
+    warehouse.stamp += 1
+    stamp = warehouse.stamp
+    stamps = warehouse.stamps
+    first = target if cells[target] == BOX_LEFT else target - 1
+    stamps[first] = stamp
+    frontier = [first]
+    boxes = []
+    while frontier:
+        next_frontier = []
+        for box in frontier:
+            boxes.append(box)
+            for idx in (box + step, box + step + 1):
+                cell = cells[idx]
+                if cell == WALL:
+                    # Any blocked box blocks the whole push
+                    return False
+                if cell == BOX_LEFT:
+                    neighbour = idx
+                elif cell == BOX_RIGHT:
+                    neighbour = idx - 1
                 else:
-                    # For vertical we have two move points one is for [ and the other for ]
-                    new_move_points = [(ab_r + dr, ab_c), (ab_r + dr, ab_c + 1)]
-                can_move, all_moved_boxes = try_move_boxes(new_move_points)
-                if not can_move:
-                    # If move not allowed (a # was encountered at some resursive descent), then abort move
-                    # until the very top of the calls.
-                    return False, []
-
-                # If move allowed, then store all the boxes that can be moved.
-                mp_boxes_to_be_moved.extend(all_moved_boxes)
-                mp_boxes_to_be_moved.append((ab_r, ab_c))
-            boxes_to_be_moved.extend(mp_boxes_to_be_moved)
-        return True, boxes_to_be_moved
-
-    # Check which boxes can be moved, and if the move is actually possible.
-    can_move, boxes_to_move = try_move_boxes([(robot_r + dr, robot_c + dc)])
-    if not can_move:
-        return False
-
-    # Clear map
-    warehouse[robot_r][robot_c] = '.'
-    for ab_r, ab_c in boxes_to_move:
-        warehouse[ab_r][ab_c] = '.'
-        warehouse[ab_r][ab_c+1] = '.'
-
-    # Set new positions
-    for ab_r, ab_c in boxes_to_move:
-        warehouse[ab_r + dr][ab_c+dc] = '['
-        warehouse[ab_r + dr][ab_c+dc+1] = ']'
-    warehouse[robot_r + dr][robot_c + dc] = '@'
-
+                    continue
+                if stamps[neighbour] != stamp:
+                    stamps[neighbour] = stamp
+                    next_frontier.append(neighbour)
+        frontier = next_frontier
+
+    for box in boxes:
+        cells[box] = FLOOR
+        cells[box + 1] = FLOOR
+    for box in boxes:
+        cells[box + step] = BOX_LEFT
+        cells[box + step + 1] = BOX_RIGHT
+    warehouse.gps += len(boxes) * warehouse.gps_steps[step]
     return True
 
 def scale_map(map_lines: List[str]) -> List[str]:
@@ -257,26 +310,18 @@ def scale_map(map_lines: List[str]) -> List[str]:
         scaled.append("".join(new_line))
     return scaled
 
-def sum_boxes(warehouse: List[List[str]], part: int) -> int:
-    rows = len(warehouse)
-    cols = len(warehouse[0]) if rows > 0 else 0
+def sum_boxes(warehouse: Warehouse, part: int) -> int:
+    # Full scan of the grid, simulation keeps the same value in warehouse.gps.
+    # GPS coordinate of a box is 100 * row + column of its (left) cell, rows and columns of the map
+    # are shifted by one in the padded grid.
+    box_code = BOX if part == 1 else BOX_LEFT
+    width = warehouse.width
     total = 0
-    if part == 1:
-        # Sum 'O' positions
-        for r in range(rows):
-            for c in range(cols):
-                if warehouse[r][c] == 'O':
-                    total += 100 * r + c
-    else:
-        # Part 2: Sum positions of '['
-        for r in range(rows):
-            c = 0
-            while c < cols:
-                if warehouse[r][c] == '[':
-                    total += 100 * r + c
-                    c += 2  # Skip past the box
-                else:
-                    c += 1
+    idx = warehouse.cells.find(box_code)
+    while idx != -1:
+        r, c = divmod(idx, width)
+        total += 100 * (r - 1) + (c - 1)
+        idx = warehouse.cells.find(box_code, idx + 1)
     return total
 
 def solve(data: str, part: int = 1) -> int:
@@ -339,6 +384,32 @@ v^^>>><<^^<>>^v^<v^vv<>v^<<>^<^v^v><^<<<><<^<v><v<>vv>>v><v^<vv<>v^<<^
     if part == 2:
         #verify_result(part2(parse_input(test_input_3)), 9021, part)
         all_pass = all_pass and verify_result(part2(parse_input(test_intput_2)), 9021, part)
+
+        # Streamed input, with a checkpoint taken after 300 moves and the simulation resumed from it.
+        checkpoints = []
+        all_pass = all_pass and verify_result(
+            solve_stream(io.StringIO(test_intput_2), 2, chunk_size=7, checkpoint=checkpoints.append,
+                         checkpoint_interval=300), 9021, part)
+        resumed = Warehouse.restore(checkpoints[0])
+        _, move_chunks = read_stream(io.StringIO(test_intput_2))
+        simulate(resumed, move_chunks, skip=resumed.moves)
+        all_pass = all_pass and verify_result(sum_boxes(resumed, 2), 9021, part)
+
+        # Sampled GPS sums must match a full scan after the same number of moves.
+        data = parse_input(test_intput_2)
+        samples = sample_gps(Warehouse(scale_map(data.map_lines)), data.moves_chunks, [700, 0, 1, 333, 5000])
+        expected = []
+        for moves in [700, 0, 1, 333]:
+            warehouse = Warehouse(scale_map(data.map_lines))
+            simulate(warehouse, ["".join(data.moves_chunks)[:moves]])
+            expected.append(sum_boxes(warehouse, 2))
+        all_pass = all_pass and verify_result(samples, expected + [None], part)
+
+        # Sampling a restored checkpoint continues the tape after it, earlier moves can't be sampled.
+        fresh = sample_gps(Warehouse(scale_map(data.map_lines)), data.moves_chunks, [300, 400])
+        restored = Warehouse.restore(checkpoints[0])
+        samples = sample_gps(restored, data.moves_chunks, [100, 300, 400])
+        all_pass = all_pass and verify_result(samples, [None] + fresh, part)
     return all_pass
 
 if __name__ == "__main__":
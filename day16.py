@@ -3,12 +3,15 @@ from typing import List, Tuple, Dict, Optional
 import heapq
 
 class ParsedData:
-    __slots__ = ["grid", "start", "end"]
+    __slots__ = ["grid", "start", "end", "forward", "junction_graph"]
 
     def __init__(self):
         self.grid: List[List[str]] = []
         self.start: Tuple[int, int] = (-1, -1)
         self.end: Tuple[int, int] = (-1, -1)
+        # Built on first use by cached_forward_states / cached_junction_graph, shared by both parts
+        self.forward: Optional[List[int]] = None
+        self.junction_graph: Optional["JunctionGraph"] = None
 
 def parse_input(data: str) -> ParsedData:
     result = ParsedData()
@@ -29,88 +32,303 @@ def part1(data: ParsedData) -> int:
 def part2(data: ParsedData) -> int:
     return solver(data, track_paths=True)
 
-def solver(data: ParsedData, track_paths: bool) -> int:
-    grid = data.grid
-    start = data.start
-    end = data.end
+# Movements: E, S, W, N
+MOVES = [(1,0), (0,1), (-1,0), (0,-1)]
 
-    # Movements: E, S, W, N
-    moves = [(1,0), (0,1), (-1,0), (0,-1)]
+State = Tuple[int, int, int]  # (x, y, direction)
 
-    # Initialize priority queue
-    heap = []
-    initial_path = [start] if track_paths else None
-    heapq.heappush(heap, (0, start[0], start[1], 0, initial_path))  # (cost, x, y, direction, path)
+# The cell by cell search encodes a state as (y * width + x) * 4 + direction.
+ROTATE_COST = 1000
+UNSEEN = -1
 
-    # Visited states: (x, y, direction) -> cost
-    visited: Dict[Tuple[int, int, int], int] = {}
+def forward_states(data: ParsedData) -> List[int]:
+    """For every encoded state the state reached by moving forward, or UNSEEN when blocked by a wall or border."""
+    grid = data.grid
+    width, height = len(grid[0]), len(grid)
+    is_open = [char != '#' for row in grid for char in row]
+    forward = [UNSEEN] * (width * height * 4)
+    for direction, (dx, dy) in enumerate(MOVES):
+        # Openness of the neighbour in this direction, shifted so it lines up with the cell
+        step = dy * width + dx
+        if step > 0:
+            neighbour_open = is_open[step:] + [False] * step
+        else:
+            neighbour_open = [False] * -step + is_open[:step]
+        if dx != 0:
+            # No wrapping into the next or previous row
+            border_x = width - 1 if dx > 0 else 0
+            for y in range(height):
+                neighbour_open[y * width + border_x] = False
+        forward[direction::4] = [(cell + step) * 4 + direction if cell_open and next_open else UNSEEN
+                                 for cell, (cell_open, next_open) in enumerate(zip(is_open, neighbour_open))]
+    return forward
 
+def cached_forward_states(data: ParsedData) -> List[int]:
+    if data.forward is None:
+        data.forward = forward_states(data)
+    return data.forward
+
+def shortest_distances(data: ParsedData, forward: List[int]) -> Tuple[List[int], Optional[int]]:
+    """
+    Dijkstra from the start (facing east) over encoded states, keeping only the cost of each settled state.
+    Edge costs are 1 and ROTATE_COST only, so a cyclic bucket queue of ROTATE_COST + 1 buckets (Dial's algorithm)
+    replaces the binary heap. Stops once costs exceed the cheapest way to the end, so every state of some
+    best path is settled. Returns (dist with UNSEEN for unsettled states, minimal cost to end or None).
+    """
+    width = len(data.grid[0])
+    end_cell = data.end[1] * width + data.end[0]
+    num_buckets = ROTATE_COST + 1
+
+    dist = [UNSEEN] * len(forward)
+    buckets: List[List[int]] = [[] for _ in range(num_buckets)]
+    buckets[0].append((data.start[1] * width + data.start[0]) * 4)
+    pending = 1
     min_cost_to_end: Optional[int] = None
-    tiles_on_paths: Dict[int, set[Tuple[int, int]]] = {}
 
-    grid_width = len(grid[0])
-    grid_height = len(grid)
+    cost = 0
+    while pending:
+        index = cost % num_buckets
+        bucket = buckets[index]
+        if bucket:
+            if min_cost_to_end is not None and cost > min_cost_to_end:
+                break
+            # Successors never land in the current bucket (cost + 1 and cost + ROTATE_COST)
+            buckets[index] = []
+            pending -= len(bucket)
+            rotate_bucket = buckets[(cost + ROTATE_COST) % num_buckets]
+            step_bucket = buckets[(cost + 1) % num_buckets]
+            for state in bucket:
+                if dist[state] != UNSEEN:
+                    continue
+                dist[state] = cost
+                if min_cost_to_end is None and state >> 2 == end_cell:
+                    min_cost_to_end = cost
 
-    while heap:
-        cost, x, y, direction, path = heapq.heappop(heap)
-        state = (x, y, direction)
+                # Move forward
+                next_state = forward[state]
+                if next_state != UNSEEN and dist[next_state] == UNSEEN:
+                    step_bucket.append(next_state)
+                    pending += 1
+
+                # Rotate clockwise and counterclockwise
+                cell = state & ~3
+                for next_state in (cell | ((state + 1) & 3), cell | ((state - 1) & 3)):
+                    if dist[next_state] == UNSEEN:
+                        rotate_bucket.append(next_state)
+                        pending += 1
+        cost += 1
+
+    return dist, min_cost_to_end
+
+def best_path_tiles(data: ParsedData, dist: List[int], forward: List[int], min_cost_to_end: int) -> set[Tuple[int, int]]:
+    """
+    Backward sweep from the end states reached with minimal cost: a predecessor u of state v lies on a best
+    path if dist[u] + cost(u -> v) == dist[v]. Predecessors are the cell behind (same direction, cost 1)
+    and the same cell facing one of the two neighbouring directions (cost ROTATE_COST).
+    """
+    width = len(data.grid[0])
+    end_state = (data.end[1] * width + data.end[0]) * 4
+    # Moving forward changes an encoded state by 4 * (dx + dy * width)
+    state_steps = [4 * (dx + dy * width) for dx, dy in MOVES]
+
+    stack = [end_state + d for d in range(4) if dist[end_state + d] == min_cost_to_end]
+    on_best_path = bytearray(len(dist))
+    for state in stack:
+        on_best_path[state] = 1
+    while stack:
+        state = stack.pop()
+        cost = dist[state]
+        cell = state & ~3
+        prev_state = state - state_steps[state & 3]
+        candidates = ((cell | ((state + 1) & 3), ROTATE_COST), (cell | ((state - 1) & 3), ROTATE_COST))
+        if 0 <= prev_state < len(dist) and forward[prev_state] == state:
+            candidates += ((prev_state, 1),)
+        for prev, weight in candidates:
+            prev_cost = dist[prev]
+            if prev_cost != UNSEEN and prev_cost + weight == cost and not on_best_path[prev]:
+                on_best_path[prev] = 1
+                stack.append(prev)
+
+    tiles = set()
+    for state, on_path in enumerate(on_best_path):
+        if on_path:
+            y, x = divmod(state >> 2, width)
+            tiles.add((x, y))
+    return tiles
+
+class JunctionGraph:
+    """
+    Maze compressed to junctions: start, end and every open cell whose number of open neighbours is not 2.
+    Nodes are encoded states at junctions. Leaving a junction state moves into exactly one corridor and
+    entering a junction state comes from exactly one, so edges are flat lists indexed by state:
+    edge_target/edge_cost for the corridor leaving the state, edge_source/edge_cost_in for the one entering it.
+    The cost includes the steps and ROTATE_COST for every bend. Rotating in place at a junction is implicit.
+    Corridors ending in a dead end are dropped, a best path never enters them. Tiles covered by an edge
+    are walked again from its source state when needed (corridor_cells), only best path edges are expanded.
+    """
+    __slots__ = ["width", "forward", "is_junction", "edge_target", "edge_cost", "edge_source", "edge_cost_in"]
 
-        # If we've already visited this state with a lower cost, skip
-        if state in visited:
-            if visited[state] < cost:
+    def __init__(self, width: int, forward: List[int]):
+        self.width = width
+        self.forward = forward
+        self.is_junction = bytearray(len(forward) // 4)
+        self.edge_target = [UNSEEN] * len(forward)
+        self.edge_cost = [0] * len(forward)
+        self.edge_source = [UNSEEN] * len(forward)
+        self.edge_cost_in = [0] * len(forward)
+
+    def corridor_end(self, state: int) -> Tuple[int, int]:
+        """Follows the corridor leaving junction state. Returns (state at next junction, cost)."""
+        forward = self.forward
+        is_junction = self.is_junction
+        state = forward[state]
+        cost = 1
+        while not is_junction[state >> 2]:
+            next_state = forward[state]
+            if next_state == UNSEEN:
+                # Corridor bends, exactly one of the two rotations leads on
+                cell = state & ~3
+                turned = cell | ((state + 1) & 3)
+                if forward[turned] == UNSEEN:
+                    turned = cell | ((state - 1) & 3)
+                next_state = forward[turned]
+                cost += ROTATE_COST
+            state = next_state
+            cost += 1
+        return state, cost
+
+    def corridor_cells(self, state: int) -> List[int]:
+        """Cells covered by the corridor leaving junction state, including the junction it ends at."""
+        forward = self.forward
+        is_junction = self.is_junction
+        state = forward[state]
+        cells = [state >> 2]
+        while not is_junction[state >> 2]:
+            next_state = forward[state]
+            if next_state == UNSEEN:
+                cell = state & ~3
+                turned = cell | ((state + 1) & 3)
+                if forward[turned] == UNSEEN:
+                    turned = cell | ((state - 1) & 3)
+                next_state = forward[turned]
+            state = next_state
+            cells.append(state >> 2)
+        return cells
+
+def build_junction_graph(data: ParsedData, forward: List[int]) -> JunctionGraph:
+    width = len(data.grid[0])
+    graph = JunctionGraph(width, forward)
+    is_junction = graph.is_junction
+
+    degree = bytes((east != UNSEEN) + (south != UNSEEN) + (west != UNSEEN) + (north != UNSEEN)
+                   for east, south, west, north in zip(forward[0::4], forward[1::4], forward[2::4], forward[3::4]))
+    for y, row in enumerate(data.grid):
+        for x, char in enumerate(row):
+            if char != '#' and degree[y * width + x] != 2:
+                is_junction[y * width + x] = 1
+    start_cell = data.start[1] * width + data.start[0]
+    end_cell = data.end[1] * width + data.end[0]
+    is_junction[start_cell] = is_junction[end_cell] = 1
+
+    edge_target, edge_cost = graph.edge_target, graph.edge_cost
+    edge_source, edge_cost_in = graph.edge_source, graph.edge_cost_in
+    for cell, junction in enumerate(is_junction):
+        if not junction:
+            continue
+        for state in range(cell * 4, cell * 4 + 4):
+            if forward[state] == UNSEEN:
                 continue
-            elif visited[state] == cost and not track_paths:
-                continue  # For Part 1, no need to process equal cost states
-        else:
-            visited[state] = cost
+            target, cost = graph.corridor_end(state)
+            target_cell = target >> 2
+            if degree[target_cell] == 1 and target_cell != start_cell and target_cell != end_cell:
+                continue  # dead end
+            edge_target[state], edge_cost[state] = target, cost
+            edge_source[target], edge_cost_in[target] = state, cost
+    return graph
 
-        # Check if we've reached the end
-        if (x, y) == end:
-            if not track_paths:
-                return cost
+def cached_junction_graph(data: ParsedData) -> JunctionGraph:
+    if data.junction_graph is None:
+        data.junction_graph = build_junction_graph(data, cached_forward_states(data))
+    return data.junction_graph
 
-            if min_cost_to_end is None:
-                min_cost_to_end = cost
-            if cost <= min_cost_to_end:
-                if path:
-                    for tile in path:
-                        tiles_on_paths.setdefault(cost, set()).add(tile)
+def solver_junctions(data: ParsedData, track_paths: bool, graph: Optional[JunctionGraph] = None) -> int:
+    """Same as the cell by cell search, but Dijkstra runs over the junction graph only."""
+    if graph is None:
+        graph = cached_junction_graph(data)
+    width = graph.width
+    end_state = (data.end[1] * width + data.end[0]) * 4
+    edge_target, edge_cost = graph.edge_target, graph.edge_cost
 
-        # If we've found the minimal cost to end and current state's cost exceeds it, terminate
+    heap = [(0, (data.start[1] * width + data.start[0]) * 4)]
+    dist: Dict[int, int] = {}
+    min_cost_to_end: Optional[int] = None
+    while heap:
+        cost, state = heapq.heappop(heap)
         if min_cost_to_end is not None and cost > min_cost_to_end:
             break
+        if state in dist:
+            continue
+        dist[state] = cost
+        if min_cost_to_end is None and state & ~3 == end_state:
+            min_cost_to_end = cost
 
-        # Move forward
-        dx, dy = moves[direction]
-        nx, ny = x + dx, y + dy
-        if 0 <= ny < grid_height and 0 <= nx < grid_width:
-            if grid[ny][nx] != '#':
-                new_state = (nx, ny, direction)
-                new_cost = cost + 1
-                if new_state not in visited or visited[new_state] >= new_cost:
-                    new_path = path + [(nx, ny)] if track_paths else None
-                    heapq.heappush(heap, (new_cost, nx, ny, direction, new_path))
-
-        # Rotate clockwise
-        new_dir_cw = (direction + 1) % 4
-        new_state_cw = (x, y, new_dir_cw)
-        new_cost_cw = cost + 1000
-        if new_state_cw not in visited or visited[new_state_cw] >= new_cost_cw:
-            heapq.heappush(heap, (new_cost_cw, x, y, new_dir_cw, path))
-
-        # Rotate counterclockwise
-        new_dir_ccw = (direction - 1) % 4
-        new_state_ccw = (x, y, new_dir_ccw)
-        new_cost_ccw = cost + 1000
-        if new_state_ccw not in visited or visited[new_state_ccw] >= new_cost_ccw:
-            heapq.heappush(heap, (new_cost_ccw, x, y, new_dir_ccw, path))
+        target = edge_target[state]
+        if target != UNSEEN and target not in dist:
+            heapq.heappush(heap, (cost + edge_cost[state], target))
+        cell = state & ~3
+        for target in (cell | ((state + 1) & 3), cell | ((state - 1) & 3)):
+            if target not in dist:
+                heapq.heappush(heap, (cost + ROTATE_COST, target))
 
     if not track_paths:
-        # Part 1: minimal cost found and returned earlier
-        raise ValueError("No valid path found from start to end")
+        if min_cost_to_end is None:
+            raise ValueError("No valid path found from start to end")
+        return min_cost_to_end
+
+    if min_cost_to_end is None:
+        return 0
+
+    # Part 2: backward sweep over tight edges, tiles come from the corridors on best paths
+    stack = [end_state + d for d in range(4) if dist.get(end_state + d) == min_cost_to_end]
+    on_best_path = set(stack)
+    tiles = {end_state >> 2}
+    edge_source, edge_cost_in = graph.edge_source, graph.edge_cost_in
+    while stack:
+        state = stack.pop()
+        cost = dist[state]
+        cell = state & ~3
+        candidates = [(cell | ((state + 1) & 3), ROTATE_COST, False), (cell | ((state - 1) & 3), ROTATE_COST, False)]
+        if edge_source[state] != UNSEEN:
+            candidates.append((edge_source[state], edge_cost_in[state], True))
+        for source, weight, is_corridor in candidates:
+            source_cost = dist.get(source)
+            if source_cost is None or source_cost + weight != cost:
+                continue
+            if is_corridor:
+                tiles.update(graph.corridor_cells(source))
+            if source not in on_best_path:
+                on_best_path.add(source)
+                stack.append(source)
+    tiles.update(state >> 2 for state in on_best_path)
+    return len(tiles)
+
+def solver(data: ParsedData, track_paths: bool, compress: bool = True) -> int:
+    if compress:
+        return solver_junctions(data, track_paths)
+
+    forward = cached_forward_states(data)
+    dist, min_cost_to_end = shortest_distances(data, forward)
+
+    if not track_paths:
+        if min_cost_to_end is None:
+            raise ValueError("No valid path found from start to end")
+        return min_cost_to_end
+
+    if min_cost_to_end is None:
+        return 0
 
     # Part 2: Collect all tiles on any minimal cost path
-    return len(tiles_on_paths.get(min_cost_to_end, set()))
+    return len(best_path_tiles(data, dist, forward, min_cost_to_end))
 
 def print_grid_with_path(grid: List[List[str]], path: set[Tuple[int, int]]) -> None:
     grid_copy = [row[:] for row in grid]
@@ -184,6 +402,10 @@ def test(part: int) -> bool:
 
         all_pass = all_pass and verify_result(result1, expected1, 1)
         all_pass = all_pass and verify_result(result2, expected2, 2)
+
+        # Cell by cell search must agree with the junction graph
+        all_pass = all_pass and solver(parsed_data, False, compress=False) == expected1
+        all_pass = all_pass and solver(parsed_data, True, compress=False) == expected2
     return all_pass
 
 if __name__ == "__main__":
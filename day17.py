@@ -1,7 +1,7 @@
 import sys
 from typing import List, Tuple, Optional
 from common import run_tests, run_day, verify_result
-from day17_translator import translate_to_python
+from day17_translator import translate_to_python, compile_program, run_compiled
 
 # Opcode to operation name mapping
 OPCODE_MAPPING = {
@@ -195,14 +195,14 @@ def execute_program(program: List[int], initial_a: int, initial_b: int, initial_
 
 
 def part1(data: ParsedData) -> str:
-    output = execute_program(data.program, data.register_a, data.register_b, data.register_c) or []
+    output = run_compiled(tuple(data.program), data.register_a, data.register_b, data.register_c) or []
     output_str = ",".join(map(str,output))
     return output_str
 
-# Returns only first out value
-def execute_until_out(data, a):
-    res = execute_program(data.program, a, 0, 0, return_on_out=True)
-    return res[0]
+# Returns only first out value (None if program halts without output)
+def execute_until_out(data, a, max_steps: int = 1000000):
+    compiled = compile_program(tuple(data.program))
+    return next(compiled(a, 0, 0, max_steps), None)
 
 def part2(data: ParsedData) -> Optional[int]:
 
@@ -216,11 +216,12 @@ def part2(data: ParsedData) -> Optional[int]:
     # Recursively build A value starting from the known output. The A value is build from the right side
     # each 3 bits represents one digit in output - but for 4 (in case of my data) the there are 4 bits, so
     # those bits overlap.
-    program_len = len(data.program)
+    program = tuple(data.program)
+    program_len = len(program)
     def find_min_a_value(pos_from_right: int, current_a_to_check: int) -> int:
         if pos_from_right > program_len:
             # Whole A was filled so check if its correct
-            if execute_program(data.program, current_a_to_check, data.register_b, data.register_c) == data.program:
+            if run_compiled(program, current_a_to_check, data.register_b, data.register_c) == data.program:
                 return current_a_to_check
             return sys.maxsize
         # Check next possible 3 bit A chunk (from the right)
@@ -270,7 +271,10 @@ Program: 0,3,5,4,3,0
     all_pass = True
 
     if part == 1:
-        all_pass = verify_result(part1(parse_input(test_input_part1)), "4,6,3,5,6,3,5,2,1,0", part)
+        data = parse_input(test_input_part1)
+        all_pass = verify_result(part1(data), "4,6,3,5,6,3,5,2,1,0", part)
+        # Compiled program must match the interpreter
+        all_pass = all_pass and run_compiled(tuple(data.program), 729, 0, 0) == execute_program(data.program, 729, 0, 0)
     elif part == 2:
         all_pass = verify_result(part2(parse_input(test_input_part2)), 117440, part)
 
@@ -1,4 +1,5 @@
-from typing import List
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 class ParsedData:
     __slots__ = ["register_a", "register_b", "register_c", "program"]
@@ -165,6 +166,111 @@ def translate_to_python(parsed_data: ParsedData) -> str:
 
     return translated_code
 
+# Generator produced by compile_program: (A, B, C, max_steps) -> output values
+CompiledProgram = Callable[[int, int, int, int], Iterator[int]]
+
+def combo_source(operand: int) -> Optional[str]:
+    """Source for a combo operand: literal 0-3 or a register, None for the invalid 7."""
+    if 0 <= operand <= 3:
+        return str(operand)
+    return OPERAND_REGISTERS.get(operand)
+
+def instruction_source(opcode: int, operand: int) -> str:
+    """
+    Single statement for one instruction (jnz is handled by the caller). Divisions by a power of two are
+    shifts and % 8 is & 7, registers never become negative.
+    """
+    name = OPCODE_MAPPING[opcode]['name']
+    if name == 'bxl':
+        return f"B ^= {operand}"
+    if name == 'bxc':
+        return "B ^= C"
+    value = combo_source(operand)
+    if value is None:
+        return f"raise ValueError('Invalid combo operand: {operand}')"
+    if name == 'adv':
+        return f"A >>= {value}"
+    if name == 'bdv':
+        return f"B = A >> {value}"
+    if name == 'cdv':
+        return f"C = A >> {value}"
+    if name == 'bst':
+        return f"B = {value} & 7"
+    if name == 'out':
+        return f"yield {value} & 7"
+    raise ValueError(f"unknown: {name} {operand}")
+
+def translate_to_generator(program: Tuple[int, ...]) -> str:
+    """
+    Translates the program into the source of a generator function yielding the output values.
+    The program is split into straight line blocks starting at 0, at jnz targets and after a jnz.
+    Blocks run without any instruction dispatch, only jumps go through the ip check. The step limit is
+    checked per block, exceeding it raises ValueError.
+    """
+    length = len(program)
+    # Blocks reachable from 0, following the jnz targets and fall through of each block
+    entries = set()
+    pending = [0]
+    while pending:
+        entry = pending.pop()
+        if entry in entries or entry >= length - 1:
+            continue
+        entries.add(entry)
+        ip = entry
+        while ip < length - 1 and program[ip] != 3:
+            ip += 2
+        if ip < length - 1:
+            pending.extend((program[ip + 1], ip + 2))
+    entries = sorted(entries)
+    if not entries:
+        # Nothing to execute, still a generator
+        return "def compiled_program(A, B, C, max_steps):\n    return\n    yield\n"
+
+    code_lines = [
+        "def compiled_program(A, B, C, max_steps):",
+        "    ip = 0",
+        "    steps = 0",
+        "    while True:",
+        "        if steps >= max_steps:",
+        "            raise ValueError(f'steps exceeded at: {ip}')",
+    ]
+    for block_index, entry in enumerate(entries):
+        code_lines.append(f"        {'if' if block_index == 0 else 'elif'} ip == {entry}:")
+        body = []
+        ip = entry
+        # Falling off the end or a missing operand halts the program
+        while ip < length - 1:
+            opcode, operand = program[ip], program[ip + 1]
+            body.append(f"# {opcode},{operand} - {OPCODE_MAPPING[opcode]['name']} {operand}")
+            if opcode == 3:
+                body.append(f"steps += {(ip - entry) // 2 + 1}")
+                body.append(f"ip = {operand} if A else {ip + 2}")
+                break
+            body.append(instruction_source(opcode, operand))
+            ip += 2
+        else:
+            body.append("return")
+        code_lines.extend(f"            {line}" for line in body)
+    code_lines.append("        else:")
+    code_lines.append("            return")
+    # Never reached, keeps this a generator for programs without out
+    code_lines.append("    yield")
+    return "\n".join(code_lines) + "\n"
+
+@lru_cache(maxsize=None)
+def compile_program(program: Tuple[int, ...]) -> CompiledProgram:
+    """Compiles the program once into a generator function, cached by the program tuple."""
+    namespace: Dict[str, CompiledProgram] = {}
+    exec(compile(translate_to_generator(program), f"<day17 {','.join(map(str, program))}>", "exec"), namespace)
+    return namespace['compiled_program']
+
+def run_compiled(program: Tuple[int, ...], initial_a: int, initial_b: int, initial_c: int, max_steps: int = 1000000) -> Optional[List[int]]:
+    """Compiled counterpart of day17.execute_program, returns None on invalid operand or exceeded steps."""
+    try:
+        return list(compile_program(program)(initial_a, initial_b, initial_c, max_steps))
+    except ValueError:
+        return None
+
 # Example usage
 def main():
     # Create a ParsedData instance with your input